@@ -10,17 +10,19 @@ Uso:
     python main.py --help           # Ayuda
 """
 import sys
-import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Agregar directorio src al path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.config import Config
-from src.logger import LoggerService
-from src.repositories.config_repository import ConfigRepository
-from src.services.backup_service import BackupService
-from src.services.scheduler_service import SchedulerService
+# Los servicios se importan de forma diferida dentro de main() para que
+# rutas rápidas como --help o --init no carguen estrategias ni drivers
+if TYPE_CHECKING:
+    from src.services.backup_service import BackupService
+
+# Separador de los bloques de log
+_BANNER = "=" * 70
 
 
 def parse_arguments():
@@ -30,6 +32,9 @@ def parse_arguments():
     Returns:
         Namespace con los argumentos parseados
     """
+    import argparse
+    from src import __version__
+    
     parser = argparse.ArgumentParser(
         description='Sistema de Backup Automático de Bases de Datos',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -51,6 +56,12 @@ Ejemplos:
         help='Modo de ejecución (default: scheduler)'
     )
     
+    parser.add_argument(
+        '--version',
+        action='version',
+        version=f'%(prog)s {__version__}'
+    )
+    
     parser.add_argument(
         '--db',
         type=str,
@@ -86,6 +97,10 @@ def initialize_config():
     Returns:
         True si se inicializó correctamente
     """
+    from src.config import Config
+    from src.logger import LoggerService
+    from src.repositories.config_repository import ConfigRepository
+
     logger = LoggerService.get_logger("Init")
     config_repo = ConfigRepository()
     
@@ -95,12 +110,11 @@ def initialize_config():
     if not Config.CONFIG_FILE.exists():
         if config_repo.create_example_config():
             created_files.append(str(Config.CONFIG_FILE))
-            logger.info(f"Creado: {Config.CONFIG_FILE}")
+            logger.info("Creado: %s", Config.CONFIG_FILE)
     
-    # Crear .env.example si no existe
+    # Crear .env.example si no existe (modo 'x': falla si ya existe, sin stat previo)
     env_example = Config.BASE_DIR / ".env.example"
-    if not env_example.exists():
-        env_content = """# Variables de entorno para credenciales
+    env_content = """# Variables de entorno para credenciales
 # Copia este archivo como .env y completa con tus credenciales
 
 # MySQL/MariaDB
@@ -115,56 +129,61 @@ PG_PASSWORD=otro_password
 MSSQL_USER=sa
 MSSQL_PASSWORD=password_sqlserver
 """
-        try:
-            with open(env_example, 'w', encoding='utf-8') as f:
-                f.write(env_content)
-            created_files.append(str(env_example))
-            logger.info(f"Creado: {env_example}")
-        except Exception as e:
-            logger.error(f"Error creando .env.example: {e}")
+    try:
+        with open(env_example, 'x', encoding='utf-8') as f:
+            f.write(env_content)
+        created_files.append(str(env_example))
+        logger.info("Creado: %s", env_example)
+    except FileExistsError:
+        pass
+    except Exception as e:
+        logger.error("Error creando .env.example: %s", e)
     
     if created_files:
-        logger.info("=" * 70)
+        logger.info(_BANNER)
         logger.info("ARCHIVOS DE CONFIGURACIÓN CREADOS")
-        logger.info("=" * 70)
+        logger.info(_BANNER)
         for file in created_files:
-            logger.info(f"  - {file}")
+            logger.info("  - %s", file)
         logger.info("")
         logger.info("IMPORTANTE:")
         logger.info("1. Copia .env.example como .env")
         logger.info("2. Edita .env con tus credenciales")
         logger.info("3. Edita config.json con tu configuración de bases de datos")
         logger.info("4. Ejecuta nuevamente este script")
-        logger.info("=" * 70)
+        logger.info(_BANNER)
         return True
     
     return False
 
 
-def show_statistics(backup_service: BackupService):
+def show_statistics(backup_service: "BackupService"):
     """
     Muestra estadísticas de backups
     
     Args:
         backup_service: Servicio de backup
     """
+    from src.config import Config
+    from src.logger import LoggerService
+
     logger = LoggerService.get_logger("Stats")
     stats = backup_service.cleanup_service.get_backup_stats(Config.BACKUP_DIR)
     
-    logger.info("=" * 70)
+    logger.info(_BANNER)
     logger.info("ESTADÍSTICAS DE BACKUPS")
-    logger.info("=" * 70)
-    logger.info(f"Directorio: {Config.BACKUP_DIR}")
-    logger.info(f"Total de archivos: {stats['total_files']}")
-    logger.info(f"Espacio utilizado: {stats['total_size_mb']:.2f} MB")
+    logger.info(_BANNER)
+    logger.info("Directorio: %s", Config.BACKUP_DIR)
+    logger.info("Total de archivos: %d", stats['total_files'])
+    logger.info("Espacio utilizado: %.2f MB", stats['total_size_mb'])
     
     if stats['oldest_backup']:
-        logger.info(f"Backup más antiguo: {stats['oldest_backup']}")
+        logger.info("Backup más antiguo: %s", stats['oldest_backup'])
     if stats['newest_backup']:
-        logger.info(f"Backup más reciente: {stats['newest_backup']}")
+        logger.info("Backup más reciente: %s", stats['newest_backup'])
     
-    logger.info(f"Retención configurada: {backup_service.backup_settings.retention_days} días")
-    logger.info("=" * 70)
+    logger.info("Retención configurada: %d días", backup_service.backup_settings.retention_days)
+    logger.info(_BANNER)
 
 
 def main():
@@ -184,8 +203,18 @@ def main():
         # En caso de fallar, el error de Unicode podría persistir, pero el programa continúa.
         pass
     
+    # Ruta rápida: --version no necesita argparse (la ayuda sí, para no duplicarla)
+    if sys.argv[1:] == ['--version']:
+        from src import __version__
+        print(f"main.py {__version__}")
+        return
+    
     args = parse_arguments()
     
+    # Cargar .env una sola vez (variables de entorno y BACKUP_DIR)
+    from src.config import Config
+    Config.bootstrap()
+    
     # Modo inicialización
     if args.init:
         initialize_config()
@@ -197,14 +226,9 @@ def main():
         print("Ejecuta: python main.py --init")
         sys.exit(1)
     
-    # Cargar variables de entorno desde .env si existe
-    env_file = Config.BASE_DIR / ".env"
-    if env_file.exists():
-        try:
-            from dotenv import load_dotenv
-            load_dotenv(env_file)
-        except ImportError:
-            pass  # python-dotenv no es obligatorio
+    from src.logger import LoggerService
+    from src.repositories.config_repository import ConfigRepository
+    from src.services.backup_service import BackupService
     
     # Crear repositorio y servicio
     config_repo = ConfigRepository()
@@ -218,14 +242,14 @@ def main():
     # Modo backup específico
     if args.db:
         logger = LoggerService.get_logger("Main")
-        logger.info(f"Realizando backup de: {args.db}")
+        logger.info("Realizando backup de: %s", args.db)
         result = backup_service.backup_specific_database(args.db)
         
         if result.success:
-            logger.info(f"✓ Backup exitoso: {result.output_file}")
+            logger.info("✓ Backup exitoso: %s", result.output_file)
             sys.exit(0)
         else:
-            logger.error(f"✗ Backup fallido: {result.error}")
+            logger.error("✗ Backup fallido: %s", result.error)
             sys.exit(1)
     
     # Modo once (una sola ejecución)
@@ -234,11 +258,11 @@ def main():
         logger.info("Modo: Ejecución única")
         results = backup_service.backup_all_databases()
         
-        # Exit code basado en resultados
-        failed = sum(1 for r in results if not r.success)
-        sys.exit(1 if failed > 0 else 0)
+        # Código de salida 1 si algún backup falló
+        sys.exit(1 if any(not r.success for r in results) else 0)
     
     # Modo scheduler (por defecto)
+    from src.services.scheduler_service import SchedulerService
     scheduler = SchedulerService(backup_service)
     scheduler.start(run_immediately=args.now)
 
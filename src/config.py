@@ -4,18 +4,15 @@ Configuración centralizada del sistema de backup
 import logging
 import os
 from pathlib import Path
-from dotenv import load_dotenv, find_dotenv
 
 class Config:
     """Configuración centralizada del sistema"""
 
-    ENV_FILE = find_dotenv()
+    # BASE_DIR debe ser la raíz donde está main.py (src/config.py -> raíz)
+    BASE_DIR = Path(__file__).resolve().parents[1]
 
-    # Cargar variables de entorno desde la raíz real del proyecto
-    load_dotenv(ENV_FILE)
-
-    # BASE_DIR debe ser la raíz donde está main.py
-    BASE_DIR = Path(ENV_FILE).parent if ENV_FILE else Path(__file__).resolve().parents[2]
+    # Archivo .env de la raíz; se carga en bootstrap(), no al importar
+    ENV_FILE = BASE_DIR / ".env"
 
     BACKUP_DIR = Path(os.getenv("BACKUP_DIR")) if os.getenv("BACKUP_DIR") else (BASE_DIR / "Backups")
     LOG_DIR = BASE_DIR / "Logs"
@@ -49,16 +46,50 @@ class Config:
         "backup_settings": {
             "retention_days": 30,  # Retención de 30 días
             "schedule": ["02:00", "02:30"],
-            "compress": True,
+            "compress": False,
             "annual_backup_enabled": True,  # Habilitar backups anuales
             "annual_backup_date": "01-01",  # Primer día del año
-            "keep_annual_backups": True  # Mantener backups anuales indefinidamente
+            "keep_annual_backups": True,  # Mantener backups anuales indefinidamente
+            "parallel_workers": 1,  # Backups simultáneos (1 = secuencial)
+            "table_workers": 4  # Tablas SQL Server exportadas a la vez por cada base
         }
     }
 
+    _bootstrapped = False
+
+    @classmethod
+    def bootstrap(cls):
+        """
+        Carga las variables de entorno desde .env (una sola vez) y recalcula
+        las rutas que dependen de ellas. Se llama desde main() al arrancar.
+        """
+        if cls._bootstrapped:
+            return
+        cls._bootstrapped = True
+
+        # Sin .env no hace falta importar python-dotenv (que además es opcional)
+        if cls.ENV_FILE.is_file():
+            try:
+                from dotenv import load_dotenv
+                load_dotenv(cls.ENV_FILE)
+            except ImportError:
+                pass
+
+        backup_dir = os.getenv("BACKUP_DIR")
+        if backup_dir:
+            cls.BACKUP_DIR = Path(backup_dir)
+            cls.ANNUAL_BACKUP_DIR = cls.BACKUP_DIR / "Annual"
+            cls._dirs_ready = False
+
+    # Evita repetir los mkdir en cada creación de logger/servicio
+    _dirs_ready = False
+
     @classmethod
     def ensure_directories(cls):
-        """Crea los directorios necesarios si no existen"""
+        """Crea los directorios necesarios si no existen (una vez por proceso)"""
+        if cls._dirs_ready:
+            return
         cls.BACKUP_DIR.mkdir(parents=True, exist_ok=True)
         cls.LOG_DIR.mkdir(parents=True, exist_ok=True)
-        cls.ANNUAL_BACKUP_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+        cls.ANNUAL_BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        cls._dirs_ready = True
\ No newline at end of file
@@ -11,7 +11,7 @@ from ..strategies.sqlserver_strategy import SQLServerBackupStrategy
 class BackupStrategyFactory:
     """Factory para crear estrategias de backup (Factory Pattern)"""
     
-    # Mapeo de tipos a estrategias
+    # Mapeo de tipos a estrategias (claves siempre en minúsculas)
     _strategies = {
         'mysql': MySQLBackupStrategy,
         'mariadb': MySQLBackupStrategy,
@@ -32,7 +32,8 @@ class BackupStrategyFactory:
         Returns:
             Instancia de BackupStrategy o None si el tipo no es soportado
         """
-        strategy_class = cls._strategies.get(db_type.lower())
+        # Caso común: el tipo ya viene en minúsculas y evita el .lower()
+        strategy_class = cls._strategies.get(db_type) or cls._strategies.get(db_type.lower())
         if strategy_class:
             return strategy_class()
         return None
@@ -1,9 +1,13 @@
 """
 Modelos de datos del sistema
 """
+import re
 from dataclasses import dataclass
 from typing import Optional
 
+# Hora en formato HH:MM (00:00 - 23:59)
+_TIME_RE = re.compile(r'(?:[01]\d|2[0-3]):[0-5]\d')
+
 @dataclass
 class DatabaseConfig:
     """Configuración de una base de datos"""
@@ -29,15 +33,21 @@ class BackupSettings:
     """Configuración de backups"""
     retention_days: int = 30
     schedule: list = None
-    compress: bool = True
+    compress: bool = False  # True: scripts .sql.gz (gzip)
     annual_backup_enabled: bool = True
     annual_backup_date: str = "01-01"  # MM-DD formato
     keep_annual_backups: bool = True
+    parallel_workers: int = 1  # Backups simultáneos (1 = secuencial)
+    table_workers: int = 4  # Tablas SQL Server exportadas a la vez por cada base
 
     def __post_init__(self):
         """Validación después de inicialización"""
         if self.retention_days < 1:
             raise ValueError("retention_days debe ser mayor a 0")
+        if self.parallel_workers < 1:
+            raise ValueError("parallel_workers debe ser mayor a 0")
+        if self.table_workers < 1:
+            raise ValueError("table_workers debe ser mayor a 0")
         if isinstance(self.schedule, str):
             self.schedule = [self.schedule]
         elif self.schedule is None:
@@ -51,14 +61,7 @@ class BackupSettings:
     @staticmethod
     def _validate_time_format(time_str: str) -> bool:
         """Valida formato de hora HH:MM"""
-        try:
-            parts = time_str.split(":")
-            if len(parts) != 2:
-                return False
-            hours, minutes = int(parts[0]), int(parts[1])
-            return 0 <= hours < 24 and 0 <= minutes < 60
-        except (ValueError, AttributeError):
-            return False
+        return isinstance(time_str, str) and _TIME_RE.fullmatch(time_str) is not None
     
     @staticmethod
     def _validate_date_format(date_str: str) -> bool:
@@ -81,6 +84,7 @@ class BackupResult:
     output_file: Optional[str] = None
     error: Optional[str] = None
     duration_seconds: float = 0.0
+    size_bytes: Optional[int] = None  # Tamaño del archivo generado
 
     def __str__(self):
         if self.success:
@@ -3,12 +3,31 @@ Repositorio para manejar configuración (Dependency Inversion)
 """
 import json
 import os
+import re
 from pathlib import Path
 from typing import Dict, List, Optional
 from ..config import Config
 from ..logger import LoggerService
 from ..models import DatabaseConfig, BackupSettings
 
+# orjson es opcional: si está instalado se usa su parser en C, si no, json estándar.
+# La escritura usa siempre json estándar para conservar el formato (indent=4) del archivo
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, indent=4, ensure_ascii=False).encode('utf-8')
+
+
+# Referencia a variable de entorno: ${NOMBRE}
+_ENV_RE = re.compile(r'^\$\{([^}]+)\}$')
+
+
 class ConfigRepository:
     """Repositorio para manejar configuración"""
 
@@ -22,6 +41,7 @@ class ConfigRepository:
         self.config_file = config_file or Config.CONFIG_FILE
         self.logger = LoggerService.get_logger("ConfigRepository")
         self._raw_config = None
+        self._settings_cache: Optional[BackupSettings] = None
 
     def load(self) -> Dict:
         """
@@ -30,16 +50,19 @@ class ConfigRepository:
         Returns:
             Diccionario con la configuración
         """
-        if not self.config_file.exists():
-            self.logger.warning(f"El archivo de configuración no existe: {self.config_file}")
-            self._raw_config = Config.DEFAULT_CONFIG
-            return self._raw_config
+        self._settings_cache = None
 
         try:
-            with open(self.config_file, "r", encoding='utf-8') as f:
-                self._raw_config = json.load(f)
+            # Abrir directamente (sin exists() previo); parsear es más barato que
+            # mantener y copiar una caché, así que cada load() lee el archivo
+            with open(self.config_file, "rb") as f:
+                self._raw_config = _loads(f.read())
             self.logger.info(f"Configuración cargada exitosamente: {self.config_file}")
             return self._raw_config
+        except FileNotFoundError:
+            self.logger.warning(f"El archivo de configuración no existe: {self.config_file}")
+            self._raw_config = Config.DEFAULT_CONFIG
+            return self._raw_config
         except json.JSONDecodeError as e:
             self.logger.error(f"Error al parsear JSON: {e}")
             self._raw_config = Config.DEFAULT_CONFIG
@@ -61,8 +84,8 @@ class ConfigRepository:
         """
         try:
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.config_file, "w", encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            with open(self.config_file, "wb") as f:
+                f.write(_dumps(config))
             self.logger.info(f"Configuración guardada exitosamente: {self.config_file}")
             return True
         except Exception as e:
@@ -107,18 +130,27 @@ class ConfigRepository:
         if self._raw_config is None:
             self.load()
 
+        if self._settings_cache is not None:
+            return self._settings_cache
+
         settings_dict = self._raw_config.get('backup_settings', {})
         try:
-            return BackupSettings(
+            settings = BackupSettings(
                 retention_days=settings_dict.get('retention_days', 30),
                 schedule=settings_dict.get('schedule', ["02:00"]),
-                compress=settings_dict.get('compress', True),
+                compress=settings_dict.get('compress', False),
+                annual_backup_enabled=settings_dict.get('annual_backup_enabled', True),
                 annual_backup_date=settings_dict.get('annual_backup_date', '01-01'),
-                keep_annual_backups=settings_dict.get('keep_annual_backups', True)
+                keep_annual_backups=settings_dict.get('keep_annual_backups', True),
+                parallel_workers=settings_dict.get('parallel_workers', 1),
+                table_workers=settings_dict.get('table_workers', 4)
             )
         except Exception as e:
             self.logger.error(f"Error al cargar configuración de backups: {str(e)}")
-            return BackupSettings()
+            settings = BackupSettings()
+
+        self._settings_cache = settings
+        return settings
 
     def _resolve_credential(self, value: str) -> str:
         """
@@ -130,13 +162,14 @@ class ConfigRepository:
         Returns:
             Valor resuelto
         """
-        if value.startswith("${") and value.endswith("}"):
-            env_var = value[2:-1]
-            resolved = os.getenv(env_var, "")
-            if not resolved:
-                self.logger.warning(f"Variable de entorno no encontrada: {env_var}")
-            return resolved
-        return value
+        match = _ENV_RE.match(value)
+        if not match:
+            return value
+        env_var = match.group(1)
+        resolved = os.environ.get(env_var, "")
+        if not resolved:
+            self.logger.warning(f"Variable de entorno no encontrada: {env_var}")
+        return resolved
 
     def create_example_config(self) -> bool:
         """
@@ -1,16 +1,24 @@
 """
 Servicio principal que orquesta los backups
 """
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from ..config import Config
 from ..logger import LoggerService
 from ..models import DatabaseConfig, BackupResult
 from ..repositories.config_repository import ConfigRepository
 from ..factories.strategy_factory import BackupStrategyFactory
+from ..strategies.base_strategy import BackupStrategy
 from .cleanup_service import CleanupService
 
+# Separadores de los bloques de log
+_BANNER = "=" * 70
+_RULE = "-" * 70
+
 
 class BackupService:
     """Servicio principal que orquesta los backups"""
@@ -28,6 +36,37 @@ class BackupService:
         # Cargar configuración
         self.databases = config_repo.get_databases()
         self.backup_settings = config_repo.get_backup_settings()
+        # Índice por nombre. El nombre forma el archivo de backup, así que dos
+        # entradas con el mismo nombre escribirían en la misma ruta
+        self._db_by_name: Dict[str, DatabaseConfig] = {}
+        for db in self.databases:
+            if db.name in self._db_by_name:
+                raise ValueError(f"Nombre de base de datos duplicado en configuración: {db.name}")
+            self._db_by_name[db.name] = db
+        
+        # Filtrado de habilitadas y estrategias resueltos una sola vez
+        # (las estrategias no guardan estado, así que se comparten por tipo)
+        self._enabled_dbs: List[DatabaseConfig] = [db for db in self.databases if db.enabled]
+        self._disabled_dbs: List[DatabaseConfig] = [db for db in self.databases if not db.enabled]
+        self._strategies: Dict[str, Optional[BackupStrategy]] = {}
+        for db in self._enabled_dbs:
+            if db.type not in self._strategies:
+                strategy = BackupStrategyFactory.create(db.type)
+                self._strategies[db.type] = strategy
+                if strategy is None:
+                    self.logger.warning("Tipo de base de datos no soportado: %s (%s)", db.type, db.name)
+                else:
+                    strategy.configure(self.backup_settings)
+        
+        # Fecha del backup anual (MM-DD) parseada una sola vez
+        self._annual_md: Optional[Tuple[int, int]] = None
+        if self.backup_settings.annual_backup_enabled:
+            annual_date = self.backup_settings.annual_backup_date
+            try:
+                month, day = map(int, annual_date.split('-'))
+                self._annual_md = (month, day)
+            except (ValueError, AttributeError):
+                self.logger.error("Formato de fecha anual inválido: %s", annual_date)
         
         # Crear directorios necesarios
         Config.ensure_directories()
@@ -46,47 +85,58 @@ class BackupService:
             Lista de resultados de backup
         """
         backup_type = "ANUAL" if is_annual else "DIARIO"
-        self.logger.info("=" * 70)
-        self.logger.info(f"INICIANDO PROCESO DE BACKUP {backup_type}")
-        self.logger.info("=" * 70)
-        
-        results = []
-        
-        for db_config in self.databases:
-            if not db_config.enabled:
-                self.logger.info(f"Base de datos deshabilitada: {db_config.name}")
-                continue
-            
-            result = self._backup_single_database(db_config, is_annual)
-            results.append(result)
+        self.logger.info(_BANNER)
+        self.logger.info("INICIANDO PROCESO DE BACKUP %s", backup_type)
+        self.logger.info(_BANNER)
+        
+        for db_config in self._disabled_dbs:
+            self.logger.info("Base de datos deshabilitada: %s", db_config.name)
+        enabled = self._enabled_dbs
+        
+        # Un único timestamp para todo el lote
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        
+        # Los dumps esperan en subprocesos/red, así que los hilos avanzan en paralelo
+        workers = min(len(enabled), self.backup_settings.parallel_workers)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda db: self._backup_single_database(db, is_annual, timestamp), enabled
+                ))
+        else:
+            results = [self._backup_single_database(db, is_annual, timestamp) for db in enabled]
         
         # Limpieza de backups antiguos (solo para backups diarios)
+        # (el mismo recorrido devuelve las estadísticas del directorio)
         if not is_annual:
-            self.logger.info("-" * 70)
-            deleted_count = self.cleanup_service.cleanup_old_backups(Config.BACKUP_DIR)
+            self.logger.info(_RULE)
+            deleted_count, stats = self.cleanup_service.cleanup_and_stats(Config.BACKUP_DIR)
         else:
             deleted_count = 0
+            stats = self.cleanup_service.get_backup_stats(Config.ANNUAL_BACKUP_DIR)
         
         # Estadísticas
-        self._print_summary(results, deleted_count, is_annual)
+        self._print_summary(results, deleted_count, stats, is_annual)
         
         return results
     
-    def _backup_single_database(self, db_config: DatabaseConfig, is_annual: bool = False) -> BackupResult:
+    def _backup_single_database(self, db_config: DatabaseConfig, is_annual: bool = False,
+                                timestamp: Optional[str] = None) -> BackupResult:
         """
         Realiza backup de una base de datos
         
         Args:
             db_config: Configuración de la base de datos
             is_annual: True si es un backup anual
+            timestamp: Marca de tiempo YYYYmmdd_HHMMSS compartida por el lote (opcional)
             
         Returns:
             Resultado del backup
         """
-        self.logger.info("-" * 70)
+        self.logger.info(_RULE)
         
-        # Crear estrategia de backup
-        strategy = BackupStrategyFactory.create(db_config.type)
+        # Estrategia precalculada en __init__
+        strategy = self._strategies.get(db_config.type)
         if not strategy:
             error_msg = f"Tipo de base de datos no soportado: {db_config.type}"
             self.logger.error(error_msg)
@@ -97,86 +147,90 @@ class BackupService:
             )
         
         # Generar nombre de archivo
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if timestamp is None:
+            timestamp = time.strftime('%Y%m%d_%H%M%S')
         
         # Determinar directorio de destino
         if is_annual:
             backup_dir = Config.ANNUAL_BACKUP_DIR
-            year = datetime.now().year
-            prefix = f"ANNUAL_{year}_"
+            prefix = f"ANNUAL_{timestamp[:4]}_"
         else:
             backup_dir = Config.BACKUP_DIR
             prefix = ""
         
-        # SQL Server produce un SQL, NO un .bak (porque usamos SQLCMD)
-        if db_config.type.lower() in ['sqlserver', 'mssql']:
-            output_file = backup_dir / f"{prefix}{db_config.name}_{timestamp}.sql"
-        else:
-            output_file = backup_dir / f"{prefix}{db_config.name}_{timestamp}.sql"
+        # Con compress=True los scripts se guardan comprimidos (.sql.gz)
+        extension = ".sql.gz" if self.backup_settings.compress else ".sql"
+        
+        # Todas las estrategias generan un script SQL (SQL Server incluido, no .bak)
+        output_file = backup_dir / f"{prefix}{db_config.name}_{timestamp}{extension}"
         
         # Ejecutar backup
         return strategy.execute_backup(db_config, output_file)
     
-    def _print_summary(self, results: List[BackupResult], deleted_count: int, is_annual: bool = False):
+    def _print_summary(self, results: List[BackupResult], deleted_count: int,
+                       stats: dict, is_annual: bool = False):
         """
         Imprime resumen de la operación de backup
         
         Args:
             results: Lista de resultados
             deleted_count: Cantidad de archivos eliminados
+            stats: Estadísticas del directorio de backups
             is_annual: True si es un backup anual
         """
-        success_count = sum(1 for r in results if r.success)
-        failed_count = len(results) - success_count
-        total_time = sum(r.duration_seconds for r in results)
-        
         backup_type = "ANUAL" if is_annual else "DIARIO"
         
-        self.logger.info("=" * 70)
-        self.logger.info(f"RESUMEN DEL PROCESO DE BACKUP {backup_type}")
-        self.logger.info("=" * 70)
+        # Se arma el resumen completo y se emite en un único registro
+        lines = [_BANNER, f"RESUMEN DEL PROCESO DE BACKUP {backup_type}", _BANNER]
+        errors = []
+        success_count = 0
+        total_time = 0.0
         
-        # Resultados individuales
+        # Resultados individuales y totales en una sola pasada
         for result in results:
+            total_time += result.duration_seconds
+            success_count += result.success
             status = "✓ EXITOSO" if result.success else "✗ FALLIDO"
-            self.logger.info(f"{status}: {result.database_name} ({result.duration_seconds:.2f}s)")
-            if result.success and result.output_file:
-                # Mostrar tamaño del archivo
-                try:
-                    file_path = Path(result.output_file)
-                    if file_path.exists():
-                        size_mb = file_path.stat().st_size / (1024 * 1024)
-                        self.logger.info(f"  Archivo: {file_path.name} ({size_mb:.2f} MB)")
-                except Exception as e:
-                    self.logger.debug(f"No se pudo obtener tamaño del archivo: {e}")
+            lines.append(f"{status}: {result.database_name} ({result.duration_seconds:.2f}s)")
+            if result.success and result.output_file and result.size_bytes is not None:
+                # Tamaño informado por la estrategia (sin stat adicional)
+                lines.append(
+                    f"  Archivo: {os.path.basename(result.output_file)} "
+                    f"({result.size_bytes / (1024 * 1024):.2f} MB)"
+                )
             if not result.success:
-                self.logger.error(f"  Error: {result.error}")
+                errors.append(f"  {result.database_name}: {result.error}")
+        
+        failed_count = len(results) - success_count
         
-        self.logger.info("-" * 70)
-        self.logger.info(f"Total de bases de datos procesadas: {len(results)}")
-        self.logger.info(f"Backups exitosos: {success_count}")
-        self.logger.info(f"Backups fallidos: {failed_count}")
-        self.logger.info(f"Tiempo total: {total_time:.2f}s")
+        lines.append(_RULE)
+        lines.append(f"Total de bases de datos procesadas: {len(results)}")
+        lines.append(f"Backups exitosos: {success_count}")
+        lines.append(f"Backups fallidos: {failed_count}")
+        lines.append(f"Tiempo total: {total_time:.2f}s")
         
         if not is_annual:
-            self.logger.info(f"Backups antiguos eliminados: {deleted_count}")
+            lines.append(f"Backups antiguos eliminados: {deleted_count}")
         
         # Estadísticas de almacenamiento
         if is_annual:
-            stats = self.cleanup_service.get_backup_stats(Config.ANNUAL_BACKUP_DIR)
-            self.logger.info(f"Backups anuales almacenados: {stats['total_files']} archivo(s)")
+            lines.append(f"Backups anuales almacenados: {stats['total_files']} archivo(s)")
         else:
-            stats = self.cleanup_service.get_backup_stats(Config.BACKUP_DIR)
-            self.logger.info(f"Backups diarios almacenados: {stats['total_files']} archivo(s)")
+            lines.append(f"Backups diarios almacenados: {stats['total_files']} archivo(s)")
+        
+        lines.append(f"Espacio utilizado: {stats['total_size_mb']:.2f} MB")
+        lines.append(_BANNER)
         
-        self.logger.info(f"Espacio utilizado: {stats['total_size_mb']:.2f} MB")
+        self.logger.info("\n".join(lines))
         
-        self.logger.info("=" * 70)
+        # Los errores se emiten aparte para conservar su nivel de severidad
+        if errors:
+            self.logger.error("Errores de backup:\n%s", "\n".join(errors))
         
         if failed_count > 0:
             self.logger.warning(
-                f"ATENCIÓN: {failed_count} backup(s) fallaron. "
-                "Revisa los errores arriba."
+                "ATENCIÓN: %d backup(s) fallaron. Revisa los errores arriba.",
+                failed_count
             )
     
     def backup_specific_database(self, database_name: str) -> BackupResult:
@@ -189,27 +243,25 @@ class BackupService:
         Returns:
             Resultado del backup
         """
-        for db_config in self.databases:
-            if db_config.name == database_name:
-                if not db_config.enabled:
-                    self.logger.warning(
-                        f"Base de datos deshabilitada: {database_name}"
-                    )
-                    return BackupResult(
-                        database_name=database_name,
-                        success=False,
-                        error="Base de datos deshabilitada en configuración"
-                    )
-                
-                return self._backup_single_database(db_config)
-        
-        error_msg = f"Base de datos no encontrada en configuración: {database_name}"
-        self.logger.error(error_msg)
-        return BackupResult(
-            database_name=database_name,
-            success=False,
-            error=error_msg
-        )
+        db_config = self._db_by_name.get(database_name)
+        if db_config is None:
+            error_msg = f"Base de datos no encontrada en configuración: {database_name}"
+            self.logger.error(error_msg)
+            return BackupResult(
+                database_name=database_name,
+                success=False,
+                error=error_msg
+            )
+        
+        if not db_config.enabled:
+            self.logger.warning("Base de datos deshabilitada: %s", database_name)
+            return BackupResult(
+                database_name=database_name,
+                success=False,
+                error="Base de datos deshabilitada en configuración"
+            )
+        
+        return self._backup_single_database(db_config)
     
     def should_create_annual_backup(self) -> bool:
         """
@@ -218,16 +270,8 @@ class BackupService:
         Returns:
             True si debe crear un backup anual
         """
-        if not self.backup_settings.annual_backup_enabled:
+        if self._annual_md is None:
             return False
         
         today = datetime.now()
-        annual_date = self.backup_settings.annual_backup_date
-        
-        try:
-            # Parsear fecha anual (MM-DD)
-            month, day = map(int, annual_date.split('-'))
-            return today.month == month and today.day == day
-        except:
-            self.logger.error(f"Formato de fecha anual inválido: {annual_date}")
-            return False
\ No newline at end of file
+        return (today.month, today.day) == self._annual_md
@@ -1,9 +1,27 @@
 """
 Servicio para limpiar backups antiguos (Single Responsibility)
 """
-from datetime import datetime, timedelta
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
+from typing import List, Tuple
 from ..logger import LoggerService
+from ..strategies.base_strategy import PARTIAL_SUFFIX, TEMP_SUFFIX
+
+# Extensiones de archivos de backup (limpieza y estadísticas). Los backups en
+# curso (*.partial) y sus temporales (*.tmp) no cuentan en las estadísticas
+_BACKUP_SUFFIXES = ('.sql', '.bak', '.sql.gz', '.bak.gz', '.dump')
+_IN_PROGRESS_SUFFIXES = (PARTIAL_SUFFIX, TEMP_SUFFIX)
+# Tiempo sin cambios tras el cual un *.partial o *.tmp se da por abandonado. Es
+# independiente de DUMP_TIMEOUT: el script SQL Server no tiene timeout y sus
+# archivos pueden pasar horas sin tocarse mientras se exportan otras tablas
+STALE_IN_PROGRESS_AGE = 24 * 3600
+# A partir de cuántos archivos vencidos se eliminan en paralelo
+_PARALLEL_UNLINK_THRESHOLD = 16
+_UNLINK_WORKERS = 8
 
 
 class CleanupService:
@@ -30,51 +48,38 @@ class CleanupService:
         Returns:
             Cantidad de archivos eliminados
         """
+        deleted_count, _ = self.cleanup_and_stats(backup_dir)
+        return deleted_count
+    
+    def cleanup_and_stats(self, backup_dir: Path) -> Tuple[int, dict]:
+        """
+        Elimina backups antiguos y calcula las estadísticas de los que quedan
+        en un único recorrido del directorio
+        PROTEGE los backups anuales (archivos que empiezan con ANNUAL_)
+        
+        Args:
+            backup_dir: Directorio de backups
+            
+        Returns:
+            Tupla (cantidad de archivos eliminados, estadísticas)
+        """
         try:
             if not backup_dir.exists():
-                self.logger.warning(f"Directorio de backups no existe: {backup_dir}")
-                return 0
+                self.logger.warning("Directorio de backups no existe: %s", backup_dir)
+                return 0, self._empty_stats()
             
-            now = datetime.now()
-            cutoff_date = now - timedelta(days=self.retention_days)
-            deleted_count = 0
-            
-            # Patrones de archivos a limpiar
-            patterns = ['*.sql', '*.bak', '*.sql.gz', '*.bak.gz', '*.dump']
-            
-            for pattern in patterns:
-                for backup_file in backup_dir.glob(pattern):
-                    try:
-                        # PROTEGER backups anuales
-                        if backup_file.name.startswith('ANNUAL_'):
-                            self.logger.debug(f"Protegiendo backup anual: {backup_file.name}")
-                            continue
-                        
-                        file_mtime = datetime.fromtimestamp(backup_file.stat().st_mtime)
-                        
-                        if file_mtime < cutoff_date:
-                            file_size = backup_file.stat().st_size / (1024 * 1024)  # MB
-                            backup_file.unlink()
-                            deleted_count += 1
-                            self.logger.info(
-                                f"Eliminado backup antiguo: {backup_file.name} "
-                                f"({file_size:.2f} MB, {(now - file_mtime).days} días)"
-                            )
-                    except Exception as e:
-                        self.logger.error(f"Error al eliminar {backup_file.name}: {e}")
+            deleted_count, stats = self._scan(backup_dir, delete_expired=True)
             
             if deleted_count > 0:
-                self.logger.info(
-                    f"Limpieza completada: {deleted_count} archivo(s) eliminado(s)"
-                )
+                self.logger.info("Limpieza completada: %d archivo(s) eliminado(s)", deleted_count)
             else:
                 self.logger.info("No hay backups antiguos para eliminar")
             
-            return deleted_count
+            return deleted_count, stats
             
         except Exception as e:
-            self.logger.error(f"Error durante limpieza: {e}")
-            return 0
+            self.logger.error("Error durante limpieza: %s", e)
+            return 0, self._empty_stats()
     
     def get_backup_stats(self, backup_dir: Path) -> dict:
         """
@@ -88,53 +93,161 @@ class CleanupService:
         """
         try:
             if not backup_dir.exists():
-                return {
-                    'total_files': 0,
-                    'total_size_mb': 0,
-                    'oldest_backup': None,
-                    'newest_backup': None,
-                    'annual_backups': 0,
-                    'daily_backups': 0
-                }
-            
-            files = (list(backup_dir.glob('*.sql')) + 
-                    list(backup_dir.glob('*.bak')) + 
-                    list(backup_dir.glob('*.dump')))
+                return self._empty_stats()
             
-            if not files:
-                return {
-                    'total_files': 0,
-                    'total_size_mb': 0,
-                    'oldest_backup': None,
-                    'newest_backup': None,
-                    'annual_backups': 0,
-                    'daily_backups': 0
-                }
+            _, stats = self._scan(backup_dir, delete_expired=False)
+            return stats
             
-            total_size = sum(f.stat().st_size for f in files)
-            oldest = min(files, key=lambda f: f.stat().st_mtime)
-            newest = max(files, key=lambda f: f.stat().st_mtime)
+        except Exception as e:
+            self.logger.error("Error obteniendo estadísticas: %s", e)
+            return self._empty_stats()
+    
+    def _scan(self, backup_dir: Path, delete_expired: bool) -> Tuple[int, dict]:
+        """
+        Recorre el directorio una sola vez con os.scandir (un stat por archivo)
+        
+        Args:
+            backup_dir: Directorio de backups
+            delete_expired: True para eliminar los backups diarios vencidos y los
+                *.partial / *.tmp abandonados (sin cambios durante STALE_IN_PROGRESS_AGE)
             
-            # Contar backups anuales vs diarios
-            annual_count = sum(1 for f in files if f.name.startswith('ANNUAL_'))
-            daily_count = len(files) - annual_count
+        Returns:
+            Tupla (cantidad de archivos eliminados, estadísticas de los restantes)
+        """
+        # Todo se compara como float (st_mtime); datetime solo al final
+        now = time.time()
+        cutoff = now - self.retention_days * 86400
+        # Un .partial o .tmp sin cambios durante tanto tiempo quedó de un proceso
+        # interrumpido (kill, reinicio) y ya no se va a publicar
+        stale_cutoff = now - STALE_IN_PROGRESS_AGE
+        expired = []
+        
+        total_files = 0
+        total_size = 0
+        annual_count = 0
+        oldest_mtime = math.inf
+        newest_mtime = -math.inf
+        
+        with os.scandir(backup_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith(_IN_PROGRESS_SUFFIXES):
+                    if delete_expired:
+                        self._collect_stale(entry, stale_cutoff, expired)
+                    continue
+                if not name.endswith(_BACKUP_SUFFIXES):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    is_annual = name.startswith('ANNUAL_')
+                    
+                    if delete_expired:
+                        if is_annual:
+                            # PROTEGER backups anuales
+                            self.logger.debug("Protegiendo backup anual: %s", name)
+                        elif st.st_mtime < cutoff:
+                            expired.append((entry.path, name, st.st_size, st.st_mtime))
+                            continue
+                    
+                    total_files += 1
+                    total_size += st.st_size
+                    annual_count += is_annual
+                    mtime = st.st_mtime
+                    if mtime < oldest_mtime:
+                        oldest_mtime = mtime
+                    if mtime > newest_mtime:
+                        newest_mtime = mtime
+                except OSError as e:
+                    self.logger.error("Error al procesar %s: %s", name, e)
+        
+        deleted_count = self._delete_files(expired, now) if expired else 0
+        
+        if not total_files:
+            return deleted_count, self._empty_stats()
+        
+        return deleted_count, {
+            'total_files': total_files,
+            'total_size_mb': total_size / (1024 * 1024),
+            'oldest_backup': datetime.fromtimestamp(oldest_mtime),
+            'newest_backup': datetime.fromtimestamp(newest_mtime),
+            'annual_backups': annual_count,
+            'daily_backups': total_files - annual_count
+        }
+    
+    def _collect_stale(self, entry: os.DirEntry, stale_cutoff: float, expired: list):
+        """
+        Agrega a expired un *.partial o *.tmp abandonado
+        
+        Args:
+            entry: Entrada del directorio terminada en .partial o .tmp
+            stale_cutoff: mtime por debajo del cual el archivo se considera abandonado
+            expired: Lista de (ruta, nombre, tamaño, mtime) a eliminar
+        """
+        try:
+            if not entry.is_file():
+                return
+            st = entry.stat()
+            if st.st_mtime < stale_cutoff:
+                expired.append((entry.path, entry.name, st.st_size, st.st_mtime))
+        except OSError as e:
+            self.logger.error("Error al procesar %s: %s", entry.name, e)
+    
+    def _delete_files(self, expired: List[Tuple[str, str, int, float]], now: float) -> int:
+        """
+        Elimina los backups vencidos; con muchos archivos las eliminaciones se
+        solapan en un pool de hilos (útil en recursos de red NFS/SMB)
+        
+        Args:
+            expired: Tuplas (ruta, nombre, tamaño, mtime) de archivos a eliminar
+            now: Timestamp actual, para calcular la antigüedad
             
-            return {
-                'total_files': len(files),
-                'total_size_mb': total_size / (1024 * 1024),
-                'oldest_backup': datetime.fromtimestamp(oldest.stat().st_mtime),
-                'newest_backup': datetime.fromtimestamp(newest.stat().st_mtime),
-                'annual_backups': annual_count,
-                'daily_backups': daily_count
+        Returns:
+            Cantidad de archivos eliminados
+        """
+        def log_deleted(name: str, size: int, mtime: float):
+            self.logger.info(
+                "Eliminado backup antiguo: %s (%.2f MB, %d días)",
+                name, size / (1024 * 1024), (now - mtime) // 86400
+            )
+        
+        deleted_count = 0
+        
+        if len(expired) < _PARALLEL_UNLINK_THRESHOLD:
+            for path, name, size, mtime in expired:
+                try:
+                    os.unlink(path)
+                    deleted_count += 1
+                    log_deleted(name, size, mtime)
+                except OSError as e:
+                    self.logger.error("Error al eliminar %s: %s", name, e)
+            return deleted_count
+        
+        with ThreadPoolExecutor(max_workers=_UNLINK_WORKERS) as executor:
+            futures = {
+                executor.submit(os.unlink, path): (name, size, mtime)
+                for path, name, size, mtime in expired
             }
-            
-        except Exception as e:
-            self.logger.error(f"Error obteniendo estadísticas: {e}")
-            return {
-                'total_files': 0,
-                'total_size_mb': 0,
-                'oldest_backup': None,
-                'newest_backup': None,
-                'annual_backups': 0,
-                'daily_backups': 0
-            }
\ No newline at end of file
+            for future in as_completed(futures):
+                name, size, mtime = futures[future]
+                try:
+                    future.result()
+                    deleted_count += 1
+                    log_deleted(name, size, mtime)
+                except OSError as e:
+                    self.logger.error("Error al eliminar %s: %s", name, e)
+        
+        return deleted_count
+    
+    @staticmethod
+    def _empty_stats() -> dict:
+        """Estadísticas de un directorio sin backups"""
+        return {
+            'total_files': 0,
+            'total_size_mb': 0,
+            'oldest_backup': None,
+            'newest_backup': None,
+            'annual_backups': 0,
+            'daily_backups': 0
+        }
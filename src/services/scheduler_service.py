@@ -5,13 +5,21 @@ import schedule
 import time
 import signal
 import sys
+import threading
 from ..logger import LoggerService
 from .backup_service import BackupService
 
+# Separadores de los bloques de log
+_BANNER = "=" * 70
+_RULE = "-" * 70
+
 
 class SchedulerService:
     """Servicio para programar y ejecutar backups automáticos"""
     
+    # Espera máxima entre revisiones (acota desfases por cambios de reloj)
+    MAX_IDLE_SECONDS = 300
+    
     def __init__(self, backup_service: BackupService):
         """
         Inicializa el servicio de programación
@@ -22,6 +30,7 @@ class SchedulerService:
         self.backup_service = backup_service
         self.logger = LoggerService.get_logger("SchedulerService")
         self.running = False
+        self._stop_event = threading.Event()
         
         # Registrar manejadores de señales para shutdown graceful
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -41,30 +50,30 @@ class SchedulerService:
         for schedule_time in schedules:
             schedule.every().day.at(schedule_time).do(self._run_daily_backup_job)
         
-        self.logger.info("=" * 70)
+        self.logger.info(_BANNER)
         self.logger.info("SERVICIO DE BACKUP AUTOMÁTICO INICIADO")
-        self.logger.info("=" * 70)
-        self.logger.info(f"Backups diarios programados: {len(schedules)}")
+        self.logger.info(_BANNER)
+        self.logger.info("Backups diarios programados: %d", len(schedules))
         for scheduled_time in schedules:
-            self.logger.info(f"  - A las {scheduled_time}")
-        self.logger.info(f"Retención de backups diarios: {self.backup_service.backup_settings.retention_days} días")
+            self.logger.info("  - A las %s", scheduled_time)
+        self.logger.info("Retención de backups diarios: %d días", self.backup_service.backup_settings.retention_days)
         
         if annual_enabled:
-            self.logger.info(f"Backup anual: Habilitado (fecha: {annual_date})")
-            self.logger.info(f"Backups anuales se mantienen indefinidamente")
+            self.logger.info("Backup anual: Habilitado (fecha: %s)", annual_date)
+            self.logger.info("Backups anuales se mantienen indefinidamente")
         else:
-            self.logger.info(f"Backup anual: Deshabilitado")
+            self.logger.info("Backup anual: Deshabilitado")
         
-        self.logger.info(f"Bases de datos configuradas: {len(self.backup_service.databases)}")
+        self.logger.info("Bases de datos configuradas: %d", len(self.backup_service.databases))
         
         for db in self.backup_service.databases:
             status = "✓ Habilitada" if db.enabled else "✗ Deshabilitada"
-            self.logger.info(f"  - {db.name} ({db.type}): {status}")
+            self.logger.info("  - %s (%s): %s", db.name, db.type, status)
         
-        self.logger.info("-" * 70)
-        self.logger.info(f"Próxima ejecución: {self.get_next_run()}")
+        self.logger.info(_RULE)
+        self.logger.info("Próxima ejecución: %s", self.get_next_run())
         self.logger.info("Presiona Ctrl+C para detener el servicio")
-        self.logger.info("=" * 70)
+        self.logger.info(_BANNER)
         
         # Ejecutar backup inmediatamente si se solicita
         if run_immediately:
@@ -76,22 +85,25 @@ class SchedulerService:
         try:
             while self.running:
                 schedule.run_pending()
-                time.sleep(60)  # Revisar cada minuto
+                # Dormir hasta la próxima ejecución en vez de despertar cada minuto
+                idle = schedule.idle_seconds()
+                timeout = self.MAX_IDLE_SECONDS if idle is None else min(self.MAX_IDLE_SECONDS, max(idle, 0))
+                self._stop_event.wait(timeout)
         except KeyboardInterrupt:
             self._shutdown()
     
     def _run_daily_backup_job(self):
         """Ejecuta el trabajo de backup diario"""
         try:
-            self.logger.info(f"Ejecutando backup programado a las {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            self.logger.info("Ejecutando backup programado a las %s", time.strftime('%Y-%m-%d %H:%M:%S'))
             
             # Verificar si hoy es día de backup anual
             should_annual = self.backup_service.should_create_annual_backup()
             
             if should_annual:
-                self.logger.info("=" * 70)
+                self.logger.info(_BANNER)
                 self.logger.info("¡HOY ES DÍA DE BACKUP ANUAL!")
-                self.logger.info("=" * 70)
+                self.logger.info(_BANNER)
                 
                 # Ejecutar backup anual
                 annual_results = self.backup_service.backup_all_databases(is_annual=True)
@@ -100,12 +112,12 @@ class SchedulerService:
                 failed_annual = [r for r in annual_results if not r.success]
                 if failed_annual:
                     self.logger.warning(
-                        f"Backup anual completado con {len(failed_annual)} error(es)"
+                        "Backup anual completado con %d error(es)", len(failed_annual)
                     )
                 else:
                     self.logger.info("Backup anual completado exitosamente")
                 
-                self.logger.info("-" * 70)
+                self.logger.info(_RULE)
                 self.logger.info("Continuando con backup diario...")
             
             # Ejecutar backup diario normal
@@ -115,14 +127,14 @@ class SchedulerService:
             failed = [r for r in results if not r.success]
             if failed:
                 self.logger.warning(
-                    f"Backup diario completado con {len(failed)} error(es). "
-                    "Revisa los logs para más detalles."
+                    "Backup diario completado con %d error(es). "
+                    "Revisa los logs para más detalles.", len(failed)
                 )
             else:
                 self.logger.info("Backup diario completado exitosamente")
                 
         except Exception as e:
-            self.logger.error(f"Error crítico durante backup: {e}", exc_info=True)
+            self.logger.error("Error crítico durante backup: %s", e, exc_info=True)
     
     def _signal_handler(self, signum, frame):
         """
@@ -134,16 +146,17 @@ class SchedulerService:
         """
         try:
             signal_name = signal.Signals(signum).name
-        except:
+        except ValueError:
             signal_name = str(signum)
         
-        self.logger.info(f"Señal recibida: {signal_name}")
+        self.logger.info("Señal recibida: %s", signal_name)
         self._shutdown()
     
     def _shutdown(self):
         """Detiene el servicio de forma ordenada"""
         self.logger.info("Deteniendo servicio de backup...")
         self.running = False
+        self._stop_event.set()
         schedule.clear()
         self.logger.info("Servicio detenido correctamente")
         sys.exit(0)
@@ -3,12 +3,34 @@ Estrategia base para backups (Strategy Pattern)
 """
 from abc import ABC, abstractmethod
 from pathlib import Path
+import gzip
+import os
 import re
-from typing import Optional
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Optional, Tuple
 from ..logger import LoggerService
-from ..models import DatabaseConfig, BackupResult
+from ..models import DatabaseConfig, BackupResult, BackupSettings
 import time
 
+# Tamaño de bloque para copiar/comprimir volcados
+_CHUNK_SIZE = 1024 * 1024
+
+# Bytes finales de stderr que se conservan para el mensaje de error
+_STDERR_TAIL = 64 * 1024
+
+# Sufijo de los archivos en escritura; se renombran al nombre final al terminar
+PARTIAL_SUFFIX = '.partial'
+
+# Sufijo de los temporales intermedios (datos de una tabla) que se añaden a un
+# script en curso y se eliminan después; nunca se publican
+TEMP_SUFFIX = '.tmp'
+
+# Tiempo máximo de un volcado de mysqldump/pg_dump
+DUMP_TIMEOUT = 3600
+
 
 class BackupStrategy(ABC):
     """Interfaz abstracta para estrategias de backup (Open/Closed Principle)"""
@@ -16,6 +38,16 @@ class BackupStrategy(ABC):
     def __init__(self):
         """Inicializa la estrategia"""
         self.logger = LoggerService.get_logger(self.__class__.__name__)
+
+    def configure(self, settings: BackupSettings):
+        """
+        Aplica la configuración de backups que afecta a la estrategia
+        (por defecto ninguna)
+        
+        Args:
+            settings: Configuración de backups
+        """
+        pass
     
     @abstractmethod
     def backup(self, db_config: DatabaseConfig, output_file: Path) -> BackupResult:
@@ -50,9 +82,14 @@ class BackupStrategy(ABC):
             result.duration_seconds = time.time() - start_time
 
             if result.success:
-                file_size = output_file.stat().st_size / (1024 * 1024)  # MB
+                # La estrategia puede escribir en otra ruta (p. ej. .sql en vez de .sql.gz)
+                if not result.output_file:
+                    result.output_file = str(output_file)
+                if result.size_bytes is None:
+                    result.size_bytes = os.stat(result.output_file).st_size
+                file_size = result.size_bytes / (1024 * 1024)  # MB
                 self.logger.info(
-                    f"Backup exitoso: {output_file.name} "
+                    f"Backup exitoso: {os.path.basename(result.output_file)} "
                     f"({file_size:.2f} MB, {result.duration_seconds:.2f}s)"
                 )
             else:
@@ -80,8 +117,126 @@ class BackupStrategy(ABC):
         Returns:
             None si todo está OK, mensaje de error en caso contrario
         """
-        import shutil
         for tool in tools:
             if not shutil.which(tool):
                 return f"La herramienta {tool} no está instalada"
-        return None
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def _partial_path(path: Path) -> Path:
+        """
+        Ruta temporal donde se escribe un backup antes de publicarlo
+        
+        Args:
+            path: Ruta final del backup
+            
+        Returns:
+            Ruta con sufijo .partial
+        """
+        return path.with_name(path.name + PARTIAL_SUFFIX)
+
+    def _run_dump(self, cmd: list, output_file: Path, env: Optional[dict] = None,
+                  timeout: int = DUMP_TIMEOUT) -> Tuple[int, str]:
+        """
+        Ejecuta una herramienta de volcado escribiendo su stdout en output_file.
+        Si output_file termina en .gz la salida se comprime en streaming
+        (con pigz/gzip si están instalados o, si no, con el módulo gzip).
+        El volcado se escribe en un archivo .partial que solo se renombra
+        a output_file si la herramienta termina correctamente
+        
+        Args:
+            cmd: Comando a ejecutar
+            output_file: Archivo de salida
+            env: Variables de entorno para el proceso (opcional)
+            timeout: Tiempo máximo en segundos
+            
+        Returns:
+            Tupla (código de salida, stderr)
+            
+        Raises:
+            subprocess.TimeoutExpired: Si el volcado supera el timeout
+        """
+        partial = self._partial_path(output_file)
+        try:
+            returncode, stderr = self._dump_to(cmd, output_file.suffix == '.gz', partial, env, timeout)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        
+        if returncode == 0:
+            os.replace(partial, output_file)
+        else:
+            partial.unlink(missing_ok=True)
+        return returncode, stderr
+
+    def _dump_to(self, cmd: list, compress: bool, target: Path, env: Optional[dict],
+                 timeout: int) -> Tuple[int, str]:
+        """
+        Ejecuta el volcado escribiendo su salida en target (ver _run_dump)
+        """
+        if not compress:
+            with tempfile.TemporaryFile() as err, open(target, 'wb') as f:
+                result = subprocess.run(
+                    cmd,
+                    stdout=f,
+                    stderr=err,
+                    env=env,
+                    timeout=timeout
+                )
+                return result.returncode, self._stderr_tail(err)
+        
+        with tempfile.TemporaryFile() as err, open(target, 'wb') as out:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, env=env)
+            
+            timed_out = threading.Event()
+            
+            def kill_on_timeout():
+                timed_out.set()
+                proc.kill()
+            
+            watchdog = threading.Timer(timeout, kill_on_timeout)
+            watchdog.start()
+            try:
+                compressor = shutil.which('pigz') or shutil.which('gzip')
+                if compressor:
+                    gz_proc = subprocess.Popen([compressor, '-c'], stdin=proc.stdout, stdout=out)
+                    proc.stdout.close()
+                    gz_returncode = gz_proc.wait()
+                else:
+                    with gzip.GzipFile(fileobj=out, mode='wb') as gz:
+                        shutil.copyfileobj(proc.stdout, gz, _CHUNK_SIZE)
+                    proc.stdout.close()
+                    gz_returncode = 0
+                returncode = proc.wait()
+            finally:
+                watchdog.cancel()
+                # Si falló la compresión (Popen del compresor, disco lleno...) el volcado
+                # seguiría bloqueado escribiendo en el pipe: se termina y se recoge
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            
+            stderr = self._stderr_tail(err)
+        
+        if returncode == 0 and gz_returncode != 0:
+            return gz_returncode, f"Error al comprimir la salida ({compressor})"
+        return returncode, stderr
+
+    @staticmethod
+    def _stderr_tail(err) -> str:
+        """
+        Lee el final de la salida de error volcada en un archivo temporal
+        
+        Args:
+            err: Archivo temporal con el stderr del proceso
+            
+        Returns:
+            Últimos _STDERR_TAIL bytes decodificados
+        """
+        size = err.seek(0, os.SEEK_END)
+        err.seek(max(0, size - _STDERR_TAIL))
+        return err.read().decode('utf-8', errors='replace')
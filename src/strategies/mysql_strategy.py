@@ -1,9 +1,10 @@
 """
 Estrategia de backup para MySQL/MariaDB
 """
+import os
 import subprocess
 from pathlib import Path
-from .base_strategy import BackupStrategy
+from .base_strategy import BackupStrategy, DUMP_TIMEOUT
 from ..models import DatabaseConfig, BackupResult
 
 
@@ -31,13 +32,16 @@ class MySQLBackupStrategy(BackupStrategy):
             )
         
         try:
+            # Configurar variable de entorno para password (no queda visible en ps)
+            env = os.environ.copy()
+            env['MYSQL_PWD'] = db_config.password
+            
             # Construir comando
             cmd = [
                 'mysqldump',
                 f'--host={db_config.host}',
                 f'--port={db_config.port}',
                 f'--user={db_config.user}',
-                f'--password={db_config.password}',
                 '--single-transaction',  # Para InnoDB sin bloqueo
                 '--routines',            # Incluir procedures y functions
                 '--triggers',            # Incluir triggers
@@ -50,46 +54,30 @@ class MySQLBackupStrategy(BackupStrategy):
                 db_config.name
             ]
             
-            # Ejecutar comando
-            with open(output_file, 'w', encoding='utf-8') as f:
-                result = subprocess.run(
-                    cmd,
-                    stdout=f,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=3600
-                )
+            # Ejecutar comando (comprime en streaming si el destino es .gz)
+            returncode, stderr = self._run_dump(cmd, output_file, env=env, timeout=DUMP_TIMEOUT)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 return BackupResult(
                     database_name=db_config.name,
                     success=True,
                     output_file=str(output_file)
                 )
             else:
-                # Limpiar archivo de salida en caso de error
-                if output_file.exists():
-                    output_file.unlink()
-                
+                # _run_dump ya descartó el .partial; no queda archivo que limpiar
                 return BackupResult(
                     database_name=db_config.name,
                     success=False,
-                    error=result.stderr
+                    error=stderr
                 )
                 
         except subprocess.TimeoutExpired:
-            if output_file.exists():
-                output_file.unlink()
             return BackupResult(
                 database_name=db_config.name,
                 success=False,
                 error="Timeout: El backup tardó más de 1 hora"
             )
         except Exception as e:
-            # Limpiar archivo de salida en caso de error
-            if output_file.exists():
-                output_file.unlink()
-            
             return BackupResult(
                 database_name=db_config.name,
                 success=False,
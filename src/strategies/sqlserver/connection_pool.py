@@ -0,0 +1,70 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+# Atributo ODBC SQL_ATTR_PACKET_SIZE (pyodbc no lo expone como constante)
+SQL_ATTR_PACKET_SIZE = 112
+
+# Paquete TDS máximo que admite SQL Server (el del driver es 4096)
+PACKET_SIZE = 32767
+
+
+class ConnectionPool:
+    """Pool mínimo de conexiones pyodbc compartido por los generadores"""
+
+    def __init__(self, connect, size: int):
+        # connect: callable sin argumentos que devuelve una conexión nueva
+        self._connect = connect
+        self._size = size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def add(self, conn):
+        """Registra una conexión ya abierta como disponible"""
+        with self._lock:
+            self._all.append(conn)
+        self._idle.put(conn)
+
+    @contextmanager
+    def acquire(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = len(self._all) < self._size
+            if can_open:
+                # Se reserva el hueco antes de conectar (fuera del lock)
+                self._all.append(None)
+
+        if not can_open:
+            return self._idle.get()
+
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._lock:
+                self._all.remove(None)
+            raise
+        with self._lock:
+            self._all[self._all.index(None)] = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
@@ -1,96 +1,213 @@
+import datetime
+import decimal
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .script_utils import PageCacheDropper
+from ..base_strategy import TEMP_SUFFIX
+
+_Q_TABLES = """
+    SELECT 
+        s.name,
+        t.name,
+        CASE WHEN EXISTS (
+            SELECT 1 FROM sys.columns c
+            WHERE c.object_id = t.object_id AND c.is_identity = 1
+        ) THEN 1 ELSE 0 END AS has_identity
+    FROM sys.tables t
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE t.is_ms_shipped = 0
+    ORDER BY s.name, t.name
+"""
+
+
+# SQL Server admite hasta 1000 filas por INSERT ... VALUES
+ROWS_PER_INSERT = 1000
+
+# Buffer del archivo de salida: cada lote se copia al buffer en vez de ir a disco
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Tablas exportadas en paralelo cuando hay pool de conexiones
+TABLE_WORKERS = 8
+
+# Fragmentos constantes ya codificados (el archivo se escribe en binario)
+_DATA_HEADER = (
+    "\n-- =============================================\n"
+    "-- DATA INSERTS\n"
+    "-- =============================================\n\n"
+).encode('utf-8')
+_BATCH_END = b";\nGO\n"
+
+# Escapado de comillas simples con una tabla de traducción (bucle en C)
+_QUOTE_ESCAPE = str.maketrans({"'": "''"})
+
+# Fechas y horas se citan con su str() (ISO con espacio, el formato de SQL Server)
+_TEMPORAL_TYPES = (datetime.datetime, datetime.date, datetime.time)
+
+
+def _fmt_str(v):
+    return "NULL" if v is None else "'" + v.translate(_QUOTE_ESCAPE) + "'"
+
+
+def _fmt_number(v):
+    return "NULL" if v is None else str(v)
+
+
+def _fmt_bool(v):
+    return "NULL" if v is None else ("1" if v else "0")
+
+
+def _fmt_temporal(v):
+    return "NULL" if v is None else f"'{v}'"
+
+
+def _fmt_bytes(v):
+    return "0x" + v.hex() if v else "NULL"
+
+
+def _fmt_any(v):
+    if v is None:
+        return "NULL"
+    elif isinstance(v, str):
+        return "'" + v.translate(_QUOTE_ESCAPE) + "'"
+    elif isinstance(v, _TEMPORAL_TYPES):
+        return f"'{v}'"
+    elif isinstance(v, (bytes, bytearray)):
+        return "0x" + v.hex() if v else "NULL"
+    elif isinstance(v, bool):
+        return "1" if v else "0"
+    return str(v)
+
+
+_FORMATTERS = {
+    str: _fmt_str,
+    int: _fmt_number,
+    float: _fmt_number,
+    decimal.Decimal: _fmt_number,
+    bool: _fmt_bool,
+    datetime.datetime: _fmt_temporal,
+    datetime.date: _fmt_temporal,
+    datetime.time: _fmt_temporal,
+    bytes: _fmt_bytes,
+    bytearray: _fmt_bytes,
+}
+
+
+def column_formatters(description):
+    """Un formateador por columna según el type_code de cursor.description"""
+    return [_FORMATTERS.get(col[1], _fmt_any) for col in description]
+
+
 class DataGenerator:
-    def __init__(self, logger):
+    def __init__(self, logger, pool=None, workers: int = TABLE_WORKERS):
         self.logger = logger
+        # Pool de conexiones para exportar tablas en paralelo (opcional)
+        self.pool = pool
+        self.workers = workers
 
     def generate(self, conn, script_file: Path):
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT s.name, t.name
-                FROM sys.tables t
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE t.is_ms_shipped = 0
-                ORDER BY s.name, t.name
-            """)
+            # Tablas con su marca de identidad: sin consultas de catálogo por tabla
+            cursor.execute(_Q_TABLES)
 
             tables = cursor.fetchall()
-            total_tables = len(tables)
-
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- DATA INSERTS\n")
-                f.write("-- =============================================\n\n")
-
-            for i, (schema, table) in enumerate(tables, 1):
-                full = f"{schema}.{table}"
-                self.logger.info(f"[DATA] ({i}/{total_tables}) {full}")
-
-                cursor.execute(f"SELECT COUNT(*) FROM [{full}]")
-                total_rows = cursor.fetchone()[0]
-
-                if total_rows == 0:
-                    self.logger.info(f"[DATA]   -> Empty table, skipping")
-                    continue
-
-                cursor.execute(f"""
-                    SELECT c.name
-                    FROM sys.columns c
-                    WHERE c.object_id = OBJECT_ID('[{full}]')
-                    ORDER BY c.column_id
-                """)
-                col_names = [c[0] for c in cursor.fetchall()]
-
-                cursor.execute(f"""
-                    SELECT COUNT(*) 
-                    FROM sys.columns 
-                    WHERE object_id = OBJECT_ID('[{full}]')
-                    AND is_identity = 1
-                """)
-                has_identity = cursor.fetchone()[0] > 0
-
-                cursor.execute(f"SELECT * FROM [{full}]")
-                rows = cursor.fetchall()
-
-                with open(script_file, 'a', encoding='utf-8') as f:
-                    f.write(f"-- DATA: {full} ({total_rows} rows)\n")
-                    if has_identity:
-                        f.write(f"SET IDENTITY_INSERT [{full}] ON;\n")
-
-                    columns_str = ", ".join(f"[{c}]" for c in col_names)
-                    batch_size = 300
-
-                    for start in range(0, len(rows), batch_size):
-                        batch = rows[start:start + batch_size]
-
-                        for row in batch:
-                            values = []
-                            for v in row:
-                                if v is None:
-                                    values.append("NULL")
-                                elif isinstance(v, str):
-                                    values.append("'" + v.replace("'", "''") + "'")
-                                elif hasattr(v, "isoformat"):
-                                    values.append(f"'{v}'")
-                                elif isinstance(v, (bytes, bytearray)):
-                                    values.append("0x" + v.hex() if v else "NULL")
-                                elif isinstance(v, bool):
-                                    values.append("1" if v else "0")
-                                else:
-                                    values.append(str(v))
-
-                            values_str = ", ".join(values)
-                            f.write(f"INSERT INTO [{full}] ({columns_str}) VALUES ({values_str});\n")
-
-                        f.write("GO\n")
-
-                    if has_identity:
-                        f.write(f"SET IDENTITY_INSERT [{full}] OFF;\n")
+
+            with open(script_file, 'ab', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(_DATA_HEADER)
+                dropper = PageCacheDropper(f)
+
+                if self.pool is None or self.workers <= 1 or len(tables) <= 1:
+                    for i, (schema, table, has_identity) in enumerate(tables, 1):
+                        self._export_table(cursor, schema, table, has_identity, i, len(tables), f, dropper)
+                else:
+                    self._export_parallel(tables, script_file.parent, f, dropper)
 
             return True
 
         except Exception as e:
             self.logger.error(f"[DATA] ERROR: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def _export_parallel(self, tables, tmp_dir: Path, f, dropper):
+        """Exporta cada tabla a un temporal con su conexión y los une en orden"""
+        total_tables = len(tables)
+
+        def export(i, schema, table, has_identity):
+            fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=TEMP_SUFFIX)
+            try:
+                with self.pool.acquire() as conn, \
+                        open(fd, 'wb', buffering=WRITE_BUFFER_SIZE) as tmp:
+                    self._export_table(conn.cursor(), schema, table, has_identity, i, total_tables, tmp)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return tmp_path
+
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            futures = [ex.submit(export, i, *row) for i, row in enumerate(tables, 1)]
+            try:
+                # Se copian en el orden original a medida que terminan
+                for future in futures:
+                    tmp_path = future.result()
+                    try:
+                        with open(tmp_path, 'rb') as tmp:
+                            shutil.copyfileobj(tmp, f, WRITE_BUFFER_SIZE)
+                            dropper.wrote(tmp.tell())
+                    finally:
+                        os.unlink(tmp_path)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None:
+                        try:
+                            os.unlink(future.result())
+                        except FileNotFoundError:
+                            pass
+                raise
+
+    def _export_table(self, cursor, schema, table, has_identity, i, total_tables, f, dropper=None):
+        full = f"{schema}.{table}"
+        self.logger.info(f"[DATA] ({i}/{total_tables}) {full}")
+
+        # Las filas se leen por lotes; sin COUNT(*) previo
+        cursor.execute(f"SELECT * FROM [{full}]")
+        cursor.arraysize = ROWS_PER_INSERT
+        batch = cursor.fetchmany(ROWS_PER_INSERT)
+
+        if not batch:
+            self.logger.info(f"[DATA]   {full} -> Empty table, skipping")
+            return
+
+        col_names = [col[0] for col in cursor.description]
+        columns_str = ", ".join(f"[{c}]" for c in col_names)
+        insert_prefix = f"INSERT INTO [{full}] ({columns_str}) VALUES\n".encode('utf-8')
+        formatters = column_formatters(cursor.description)
+
+        header = f"-- DATA: {full}\n"
+        if has_identity:
+            header += f"SET IDENTITY_INSERT [{full}] ON;\n"
+        f.write(header.encode('utf-8'))
+
+        total_rows = 0
+        while batch:
+            total_rows += len(batch)
+            values_sql = ",\n".join([
+                "(" + ", ".join([fmt(v) for fmt, v in zip(formatters, row)]) + ")"
+                for row in batch
+            ])
+            values = values_sql.encode('utf-8')
+            f.writelines((insert_prefix, values, _BATCH_END))
+            if dropper is not None:
+                dropper.wrote(len(values))
+            batch = cursor.fetchmany(ROWS_PER_INSERT)
+
+        if has_identity:
+            f.write(f"SET IDENTITY_INSERT [{full}] OFF;\n".encode('utf-8'))
+
+        self.logger.info(f"[DATA]   {full} -> {total_rows} rows")
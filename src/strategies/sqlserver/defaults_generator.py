@@ -1,5 +1,27 @@
 from pathlib import Path
 
+from .script_utils import write_batches
+
+_HEADER = (
+    "\n-- =============================================\n"
+    "-- DEFAULT CONSTRAINTS\n"
+    "-- =============================================\n\n"
+)
+
+_Q_DEFAULTS = """
+    SELECT 
+        dc.name,
+        s.name,
+        t.name,
+        c.name,
+        dc.definition
+    FROM sys.default_constraints dc
+    INNER JOIN sys.columns c ON c.default_object_id = dc.object_id
+    INNER JOIN sys.tables t ON t.object_id = c.object_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+"""
+
+
 class DefaultConstraintGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -8,31 +30,18 @@ class DefaultConstraintGenerator:
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT 
-                    dc.name,
-                    s.name,
-                    t.name,
-                    c.name,
-                    dc.definition
-                FROM sys.default_constraints dc
-                INNER JOIN sys.columns c ON c.default_object_id = dc.object_id
-                INNER JOIN sys.tables t ON t.object_id = c.object_id
-                INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
-            """)
+            cursor.execute(_Q_DEFAULTS)
 
             rows = cursor.fetchall()
 
             with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- DEFAULT CONSTRAINTS\n")
-                f.write("-- =============================================\n\n")
-
-                for def_name, schema, table, col, definition in rows:
-                    f.write(
-                        f"ALTER TABLE [{schema}].[{table}] "
-                        f"ADD CONSTRAINT [{def_name}] DEFAULT {definition} FOR [{col}];\nGO\n"
-                    )
+                f.write(_HEADER)
+
+                write_batches(f, [
+                    f"ALTER TABLE [{schema}].[{table}] "
+                    f"ADD CONSTRAINT [{def_name}] DEFAULT {definition} FOR [{col}]"
+                    for def_name, schema, table, col, definition in rows
+                ])
 
             return True
 
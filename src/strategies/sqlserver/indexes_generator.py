@@ -1,5 +1,62 @@
 from pathlib import Path
 
+from .script_utils import supports_string_agg, write_batches
+
+_HEADER = (
+    "\n-- =============================================\n"
+    "-- INDEXES\n"
+    "-- =============================================\n\n"
+)
+
+_Q_INDEXES_LEGACY = """
+    SELECT 
+        i.name,
+        s.name,
+        t.name,
+        STUFF((
+            SELECT ', ' + c.name
+            FROM sys.index_columns ic2
+            INNER JOIN sys.columns c
+                ON c.object_id = ic2.object_id 
+                AND c.column_id = ic2.column_id
+            WHERE ic2.object_id = i.object_id
+            AND ic2.index_id = i.index_id
+            ORDER BY ic2.key_ordinal
+            FOR XML PATH(''), TYPE
+        ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') AS cols
+    FROM sys.indexes i
+    INNER JOIN sys.tables t ON t.object_id = i.object_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE i.is_primary_key = 0
+    AND i.is_unique_constraint = 0
+    AND i.index_id > 0
+"""
+
+
+# SQL Server 2017+: agregado nativo en vez de FOR XML PATH
+_Q_INDEXES = """
+    SELECT 
+        i.name,
+        s.name,
+        t.name,
+        STRING_AGG(CAST(c.name AS NVARCHAR(MAX)), ', ')
+            WITHIN GROUP (ORDER BY ic.key_ordinal) AS cols
+    FROM sys.indexes i
+    INNER JOIN sys.tables t ON t.object_id = i.object_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    INNER JOIN sys.index_columns ic
+        ON ic.object_id = i.object_id
+        AND ic.index_id = i.index_id
+    INNER JOIN sys.columns c
+        ON c.object_id = ic.object_id
+        AND c.column_id = ic.column_id
+    WHERE i.is_primary_key = 0
+    AND i.is_unique_constraint = 0
+    AND i.index_id > 0
+    GROUP BY i.object_id, i.index_id, i.name, s.name, t.name
+"""
+
+
 class IndexGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -8,43 +65,18 @@ class IndexGenerator:
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT 
-                    i.name,
-                    s.name,
-                    t.name,
-                    STUFF((
-                        SELECT ', ' + c.name
-                        FROM sys.index_columns ic2
-                        INNER JOIN sys.columns c
-                            ON c.object_id = ic2.object_id 
-                            AND c.column_id = ic2.column_id
-                        WHERE ic2.object_id = i.object_id
-                        AND ic2.index_id = i.index_id
-                        ORDER BY ic2.key_ordinal
-                        FOR XML PATH(''), TYPE
-                    ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') AS cols
-                FROM sys.indexes i
-                INNER JOIN sys.tables t ON t.object_id = i.object_id
-                INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
-                WHERE i.is_primary_key = 0
-                AND i.is_unique_constraint = 0
-                AND i.index_id > 0
-            """)
+            cursor.execute(_Q_INDEXES if supports_string_agg(cursor) else _Q_INDEXES_LEGACY)
 
             rows = cursor.fetchall()
 
             with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- INDEXES\n")
-                f.write("-- =============================================\n\n")
-
-                for idx_name, schema, table, cols in rows:
-                    if cols:
-                        f.write(
-                            f"CREATE INDEX [{idx_name}] "
-                            f"ON [{schema}].[{table}] ({cols});\nGO\n"
-                        )
+                f.write(_HEADER)
+
+                write_batches(f, [
+                    f"CREATE INDEX [{idx_name}] ON [{schema}].[{table}] ({cols})"
+                    for idx_name, schema, table, cols in rows
+                    if cols
+                ])
 
             return True
 
@@ -1,5 +1,23 @@
 from pathlib import Path
 
+_HEADER = (
+    "\n-- =============================================\n"
+    "-- STORED PROCEDURES\n"
+    "-- =============================================\n\n"
+)
+
+_Q_PROCEDURES = """
+    SELECT 
+        s.name,
+        p.name,
+        m.definition
+    FROM sys.procedures p
+    INNER JOIN sys.schemas s ON s.schema_id = p.schema_id
+    INNER JOIN sys.sql_modules m ON m.object_id = p.object_id
+    ORDER BY s.name, p.name
+"""
+
+
 class StoredProcedureGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -8,23 +26,12 @@ class StoredProcedureGenerator:
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT 
-                    s.name,
-                    p.name,
-                    m.definition
-                FROM sys.procedures p
-                INNER JOIN sys.schemas s ON s.schema_id = p.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = p.object_id
-                ORDER BY s.name, p.name
-            """)
+            cursor.execute(_Q_PROCEDURES)
 
             procs = cursor.fetchall()
 
             with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- STORED PROCEDURES\n")
-                f.write("-- =============================================\n\n")
+                f.write(_HEADER)
 
                 for schema, name, definition in procs:
                     f.write(f"IF OBJECT_ID('[{schema}].[{name}]', 'P') IS NOT NULL DROP PROCEDURE [{schema}].[{name}];\nGO\n")
@@ -1,6 +1,84 @@
 import pyodbc
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
+from .data_generator import WRITE_BUFFER_SIZE
+from .script_utils import supports_string_agg
+
+_SCHEMA_HEADER = (
+    "\n-- =============================================\n"
+    "-- SCHEMA: TABLES + PRIMARY KEYS\n"
+    "-- =============================================\n\n"
+).encode('utf-8')
+
+_Q_TABLES = """
+    SELECT t.object_id, s.name, t.name
+    FROM sys.tables t
+    INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE t.is_ms_shipped = 0
+    ORDER BY s.name, t.name
+"""
+
+_Q_COLUMNS = """
+    SELECT 
+        c.object_id,
+        c.name,
+        TYPE_NAME(c.user_type_id),
+        c.max_length,
+        c.precision,
+        c.scale,
+        c.is_nullable,
+        c.is_identity
+    FROM sys.columns c
+    INNER JOIN sys.tables t ON t.object_id = c.object_id
+    WHERE t.is_ms_shipped = 0
+    ORDER BY c.object_id, c.column_id
+"""
+
+_Q_PRIMARY_KEYS_LEGACY = """
+    SELECT 
+        i.object_id,
+        i.name,
+        STUFF((
+            SELECT ', ' + c.name
+            FROM sys.index_columns ic2
+            INNER JOIN sys.columns c 
+                ON ic2.object_id = c.object_id 
+                AND ic2.column_id = c.column_id
+            WHERE ic2.object_id = i.object_id
+            AND ic2.index_id = i.index_id
+            ORDER BY ic2.key_ordinal
+            FOR XML PATH(''), TYPE
+        ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') AS columns
+    FROM sys.indexes i
+    INNER JOIN sys.tables t ON t.object_id = i.object_id
+    WHERE t.is_ms_shipped = 0
+    AND i.is_primary_key = 1
+"""
+
+
+# SQL Server 2017+: agregado nativo en vez de FOR XML PATH
+_Q_PRIMARY_KEYS = """
+    SELECT 
+        i.object_id,
+        i.name,
+        STRING_AGG(CAST(c.name AS NVARCHAR(MAX)), ', ')
+            WITHIN GROUP (ORDER BY ic.key_ordinal) AS columns
+    FROM sys.indexes i
+    INNER JOIN sys.tables t ON t.object_id = i.object_id
+    INNER JOIN sys.index_columns ic
+        ON ic.object_id = i.object_id
+        AND ic.index_id = i.index_id
+    INNER JOIN sys.columns c 
+        ON c.object_id = ic.object_id 
+        AND c.column_id = ic.column_id
+    WHERE t.is_ms_shipped = 0
+    AND i.is_primary_key = 1
+    GROUP BY i.object_id, i.name
+"""
+
+
 class SchemaGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -9,53 +87,45 @@ class SchemaGenerator:
         try:
             cursor = conn.cursor()
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- SCHEMA: TABLES + PRIMARY KEYS\n")
-                f.write("-- =============================================\n\n")
-
-            cursor.execute("""
-                SELECT s.name, t.name
-                FROM sys.tables t
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE t.is_ms_shipped = 0
-                ORDER BY s.name, t.name
-            """)
+            cursor.execute(_Q_TABLES)
 
             tables = cursor.fetchall()
             total = len(tables)
 
             self.logger.info(f"[SCHEMA] Total tables: {total}")
 
-            for i, (schema, table) in enumerate(tables, 1):
-                full = f"{schema}.{table}"
-                self.logger.info(f"[SCHEMA] ({i}/{total}) {full}")
-
-                with open(script_file, 'a', encoding='utf-8') as f:
-                    f.write(f"\n-- TABLE: {full}\n")
-                    f.write(f"IF OBJECT_ID('[{full}]', 'U') IS NOT NULL DROP TABLE [{full}];\nGO\n\n")
-
-                # Columnas
-                cursor.execute(f"""
-                    SELECT 
-                        c.name,
-                        TYPE_NAME(c.user_type_id),
-                        c.max_length,
-                        c.precision,
-                        c.scale,
-                        c.is_nullable,
-                        c.is_identity
-                    FROM sys.columns c
-                    WHERE c.object_id = OBJECT_ID('[{full}]')
-                    ORDER BY c.column_id
-                """)
-
-                columns = cursor.fetchall()
-
-                with open(script_file, 'a', encoding='utf-8') as f:
-                    f.write(f"CREATE TABLE [{full}] (\n")
-
-                    for idx, col in enumerate(columns):
+            # Columnas de todas las tablas en una sola consulta
+            cursor.execute(_Q_COLUMNS)
+
+            columns_by_table = {
+                object_id: [col[1:] for col in cols]
+                for object_id, cols in groupby(cursor.fetchall(), key=itemgetter(0))
+            }
+
+            # PKs de todas las tablas en una sola consulta
+            cursor.execute(_Q_PRIMARY_KEYS if supports_string_agg(cursor) else _Q_PRIMARY_KEYS_LEGACY)
+
+            pk_by_table = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+            with open(script_file, 'ab', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(_SCHEMA_HEADER)
+
+                for i, (object_id, schema, table) in enumerate(tables, 1):
+                    full = f"{schema}.{table}"
+                    self.logger.info(f"[SCHEMA] ({i}/{total}) {full}")
+
+                    columns = columns_by_table.get(object_id, [])
+                    pk = pk_by_table.get(object_id)
+
+                    # Todo el bloque de la tabla se arma y se escribe de una vez
+                    parts = [
+                        f"\n-- TABLE: {full}\n",
+                        f"IF OBJECT_ID('[{full}]', 'U') IS NOT NULL DROP TABLE [{full}];\nGO\n\n",
+                        f"CREATE TABLE [{full}] (\n",
+                    ]
+
+                    lines = []
+                    for col in columns:
                         col_name, type_name, max_len, precision, scale, nullable, is_identity = col
 
                         # tipos
@@ -72,37 +142,16 @@ class SchemaGenerator:
                         if is_identity:
                             line += " IDENTITY(1,1)"
                         line += " NULL" if nullable else " NOT NULL"
-                        if idx < len(columns) - 1:
-                            line += ","
-                        f.write(line + "\n")
-
-                    f.write(");\nGO\n\n")
-
-                # PK
-                cursor.execute(f"""
-                    SELECT 
-                        i.name,
-                        STUFF((
-                            SELECT ', ' + c.name
-                            FROM sys.index_columns ic2
-                            INNER JOIN sys.columns c 
-                                ON ic2.object_id = c.object_id 
-                                AND ic2.column_id = c.column_id
-                            WHERE ic2.object_id = i.object_id
-                            AND ic2.index_id = i.index_id
-                            ORDER BY ic2.key_ordinal
-                            FOR XML PATH(''), TYPE
-                        ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') AS columns
-                    FROM sys.indexes i
-                    WHERE i.object_id = OBJECT_ID('[{full}]')
-                    AND i.is_primary_key = 1
-                """)
-
-                pk = cursor.fetchone()
-                if pk and pk[1]:
-                    pk_name, cols = pk
-                    with open(script_file, 'a', encoding='utf-8') as f:
-                        f.write(f"ALTER TABLE [{full}] ADD CONSTRAINT [{pk_name}] PRIMARY KEY ({cols});\nGO\n\n")
+                        lines.append(line)
+
+                    parts.append(",\n".join(lines))
+                    parts.append("\n);\nGO\n\n")
+
+                    if pk and pk[1]:
+                        pk_name, cols = pk
+                        parts.append(f"ALTER TABLE [{full}] ADD CONSTRAINT [{pk_name}] PRIMARY KEY ({cols});\nGO\n\n")
+
+                    f.write("".join(parts).encode('utf-8'))
 
             return True
 
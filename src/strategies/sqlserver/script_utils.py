@@ -0,0 +1,121 @@
+"""
+Utilidades de escritura del script SQL Server: lotes GO, versión del servidor,
+page cache y concatenación de archivos
+"""
+import io
+import os
+import shutil
+from pathlib import Path
+
+# Sentencias DDL simples (ALTER TABLE / CREATE INDEX) por cada lote GO
+DDL_BATCH_SIZE = 100
+
+
+def write_batches(f, statements, batch_size: int = DDL_BATCH_SIZE):
+    """Escribe las sentencias agrupadas en lotes separados por GO"""
+    for start in range(0, len(statements), batch_size):
+        f.write(";\n".join(statements[start:start + batch_size]) + ";\nGO\n")
+
+
+def supports_string_agg(cursor) -> bool:
+    """STRING_AGG existe desde SQL Server 2017 (versión mayor 14)"""
+    cursor.execute("SELECT CAST(SERVERPROPERTY('ProductMajorVersion') AS int)")
+    row = cursor.fetchone()
+    return bool(row and row[0] and row[0] >= 14)
+
+
+def supports_create_or_alter(cursor) -> bool:
+    """CREATE OR ALTER existe desde SQL Server 2016 SP1 (13.0.4001)"""
+    cursor.execute(
+        "SELECT CAST(SERVERPROPERTY('ProductMajorVersion') AS int), "
+        "CAST(SERVERPROPERTY('ProductBuild') AS int)"
+    )
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        return False
+    major, build = row[0], row[1] or 0
+    return major > 13 or (major == 13 and build >= 4001)
+
+
+# Cada cuántos bytes escritos se liberan del page cache las páginas del script
+DROP_CACHE_EVERY = 64 * 1024 * 1024
+
+_fadvise = getattr(os, 'posix_fadvise', None)
+
+
+class PageCacheDropper:
+    """Pide al kernel descartar del page cache lo ya escrito (no-op sin posix_fadvise)"""
+
+    def __init__(self, f, every: int = DROP_CACHE_EVERY):
+        self.f = f
+        self.every = every
+        self.pending = 0
+
+    def wrote(self, nbytes: int):
+        if _fadvise is None:
+            return
+        self.pending += nbytes
+        if self.pending >= self.every:
+            self.pending = 0
+            self.f.flush()
+            _fadvise(self.f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def drop_page_cache(path: Path):
+    """Lleva a disco un archivo ya cerrado y descarta sus páginas del page cache"""
+    if _fadvise is None:
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # DONTNEED solo descarta páginas limpias: antes hay que escribirlas
+        os.fsync(fd)
+        _fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_copy_file_range = getattr(os, 'copy_file_range', None)
+
+
+def append_files(target: Path, sources, bufsize: int = 1024 * 1024):
+    """Añade al final de target los archivos de sources que existan"""
+    # copy_file_range no admite destinos abiertos con O_APPEND, por eso r+b
+    with open(target, "r+b") as out:
+        out.seek(0, os.SEEK_END)
+        for source in sources:
+            if source.exists():
+                append_file(out, source, bufsize)
+
+
+def append_file(out, source: Path, bufsize: int = 1024 * 1024):
+    """Añade source en la posición actual de out (binario y sin O_APPEND)"""
+    out.flush()
+    with open(source, "rb") as src:
+        # Solo sobre archivos reales: un GzipFile también tiene fileno()
+        # pero sus bytes deben pasar por el compresor
+        direct = isinstance(out, (io.BufferedWriter, io.BufferedRandom))
+        if not (direct and _copy_in_kernel(src, out)):
+            shutil.copyfileobj(src, out, bufsize)
+
+
+def _copy_in_kernel(src, out) -> bool:
+    """Copia src en out sin pasar por espacio de usuario; False si no es posible"""
+    if _copy_file_range is None:
+        return False
+    remaining = os.fstat(src.fileno()).st_size
+    copied = 0
+    try:
+        while remaining > 0:
+            n = _copy_file_range(src.fileno(), out.fileno(), remaining)
+            if n == 0:
+                break
+            copied += n
+            remaining -= n
+    except OSError:
+        # Sin soporte del kernel o del sistema de archivos: se usa la copia normal
+        if copied:
+            raise
+        return False
+    return True
@@ -1,4 +1,5 @@
 import pyodbc
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -11,10 +12,18 @@ from .foreign_keys_generator import ForeignKeyGenerator
 from .triggers_generator import TriggerGenerator
 
 from .views_generator import ViewGenerator
+from .connection_pool import ConnectionPool, SQL_ATTR_PACKET_SIZE, PACKET_SIZE
+from .script_utils import append_files
 
 from ..base_strategy import BackupStrategy
 from ...models import DatabaseConfig, BackupResult
 
+# Generadores que se ejecutan en paralelo (cada uno con su conexión)
+MAX_GENERATOR_WORKERS = 4
+
+# Conexiones compartidas entre generadores y tablas de datos en paralelo
+POOL_SIZE = 8
+
 
 class SQLServerBackupStrategy(BackupStrategy):
 
@@ -28,6 +37,10 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not conn:
                 return BackupResult(database_name=db_name, success=False, error="Connection failed")
 
+            # La primera conexión se reutiliza desde el pool
+            pool = ConnectionPool(lambda: self._connect_or_raise(db_config, db_name), POOL_SIZE)
+            pool.add(conn)
+
             try:
                 # Encabezado
                 with open(script_file, "w", encoding="utf-8") as f:
@@ -35,25 +48,43 @@ class SQLServerBackupStrategy(BackupStrategy):
                     f.write(f"-- DATE: {datetime.now()}\n")
                     f.write(f"USE [{db_name}];\nGO\n\n")
 
-                # Crear módulos
-                schema = SchemaGenerator(self.logger)
-                data = DataGenerator(self.logger)
-                defaults = DefaultConstraintGenerator(self.logger)
-                indexes = IndexGenerator(self.logger)
-                procs = StoredProcedureGenerator(self.logger)
-                fks = ForeignKeyGenerator(self.logger)
-                triggers = TriggerGenerator(self.logger)
-                views = ViewGenerator(self.logger)
-
-                # Ejecutar en orden correcto
-                schema.generate(conn, script_file)
-                data.generate(conn, script_file)
-                defaults.generate(conn, script_file)
-                indexes.generate(conn, script_file)
-                procs.generate(conn, script_file)
-                triggers.generate(conn, script_file)
-                views.generate(conn, script_file)
-                fks.generate(conn, script_file)
+                # Secciones en el orden en que deben quedar en el script
+                plan = [
+                    ("schema", SchemaGenerator(self.logger)),
+                    ("data", DataGenerator(self.logger, pool=pool)),
+                    ("defaults", DefaultConstraintGenerator(self.logger)),
+                    ("indexes", IndexGenerator(self.logger)),
+                    ("procs", StoredProcedureGenerator(self.logger)),
+                    ("triggers", TriggerGenerator(self.logger)),
+                    ("views", ViewGenerator(self.logger)),
+                    ("fks", ForeignKeyGenerator(self.logger)),
+                ]
+                sections = [(name, gen, script_file.with_suffix(f".{name}.sql")) for name, gen in plan]
+
+                # Cada generador escribe su propio archivo con su propia conexión
+                try:
+                    with ThreadPoolExecutor(max_workers=MAX_GENERATOR_WORKERS) as ex:
+                        futures = [
+                            ex.submit(self._run_generator, pool, gen, section_file)
+                            for _, gen, section_file in sections
+                        ]
+                        failed = [
+                            name for (name, _, _), future in zip(sections, futures)
+                            if not future.result()
+                        ]
+
+                    if failed:
+                        # Un script sin alguna sección no es un backup válido: no se publica
+                        error = f"Sections failed: {', '.join(failed)}"
+                        self.logger.error(f"[BACKUP] {error}")
+                        script_file.unlink(missing_ok=True)
+                        return BackupResult(database_name=db_name, success=False, error=error)
+
+                    # Unir las secciones en orden
+                    append_files(script_file, [section_file for _, _, section_file in sections])
+                finally:
+                    for _, _, section_file in sections:
+                        section_file.unlink(missing_ok=True)
 
                 size_mb = script_file.stat().st_size / (1024 * 1024)
                 self.logger.info(f"[BACKUP] Completed {script_file} ({size_mb:.2f} MB)")
@@ -61,24 +92,40 @@ class SQLServerBackupStrategy(BackupStrategy):
                 return BackupResult(database_name=db_name, success=True, output_file=str(script_file))
 
             finally:
-                conn.close()
+                pool.close()
 
         except Exception as e:
             self.logger.error(f"[BACKUP] ERROR: {e}")
             return BackupResult(database_name=db_name, success=False, error=str(e))
 
+    def _run_generator(self, pool: ConnectionPool, generator, section_file: Path) -> bool:
+        try:
+            with pool.acquire() as conn:
+                return generator.generate(conn, section_file)
+        except ConnectionError as e:
+            self.logger.error(f"[BACKUP] {e}")
+            return False
+
+    def _connect_or_raise(self, db_config: DatabaseConfig, db_name: str):
+        conn = self._connect(db_config, db_name)
+        if not conn:
+            raise ConnectionError(f"Could not connect to {db_config.host}")
+        return conn
+
     def _connect(self, db_config: DatabaseConfig, db_name: str):
         try:
+            server = db_config.host if db_config.port == 1433 else f"{db_config.host},{db_config.port}"
             conn_str = (
                 f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={db_config.host};"
+                f"SERVER={server};"
                 f"DATABASE={db_name};"
                 f"UID={db_config.user};"
                 f"PWD={db_config.password};"
                 f"TrustServerCertificate=yes;"
             )
             self.logger.info(f"[SQLSERVER] Connecting to {db_config.host}")
-            return pyodbc.connect(conn_str, timeout=30)
+            return pyodbc.connect(conn_str, timeout=30, autocommit=True,
+                                  attrs_before={SQL_ATTR_PACKET_SIZE: PACKET_SIZE})
         except Exception as e:
             self.logger.error(f"[SQLSERVER] Connection error: {e}")
             return None
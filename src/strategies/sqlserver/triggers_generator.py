@@ -1,5 +1,53 @@
+import re
 from pathlib import Path
 
+from .data_generator import WRITE_BUFFER_SIZE
+from .script_utils import supports_create_or_alter
+
+_HEADER = (
+    "\n-- =============================================\n"
+    "-- TRIGGERS\n"
+    "-- =============================================\n\n"
+).encode('utf-8')
+
+# CREATE TRIGGER como primera sentencia, saltando espacios y comentarios iniciales
+# (-- de línea y /* */ sin anidar); grupo 1 = lo que lo precede
+_CREATE_TRIG_RE = re.compile(
+    r'\A((?:\s+|--[^\n]*(?:\n|\Z)|/\*(?:(?!/\*).)*?\*/)*)CREATE\s+TRIGGER\b',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Filas por fetchmany
+FETCH_SIZE = 500
+
+_Q_TRIGGERS = """
+    SELECT 
+        s.name,
+        t.name,
+        tr.name,
+        m.definition
+    FROM sys.triggers tr
+    INNER JOIN sys.tables t ON t.object_id = tr.parent_id
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    INNER JOIN sys.sql_modules m ON m.object_id = tr.object_id
+    WHERE tr.is_ms_shipped = 0
+    ORDER BY s.name, t.name, tr.name
+"""
+
+
+def _trigger_script(schema: str, trigger: str, definition: str, create_or_alter: bool) -> str:
+    if create_or_alter:
+        # Un solo lote por trigger: CREATE OR ALTER reemplaza el DROP previo
+        text, found = _CREATE_TRIG_RE.subn(r'\1CREATE OR ALTER TRIGGER', definition, count=1)
+        if found:
+            return f"{text}\nGO\n\n"
+    # Sin CREATE OR ALTER, o definición que no empieza por CREATE TRIGGER: DROP + CREATE
+    return (
+        f"IF OBJECT_ID('[{schema}].[{trigger}]', 'TR') IS NOT NULL DROP TRIGGER [{schema}].[{trigger}];\nGO\n"
+        f"{definition}\nGO\n\n"
+    )
+
+
 class TriggerGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -8,30 +56,19 @@ class TriggerGenerator:
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT 
-                    s.name,
-                    t.name,
-                    tr.name,
-                    m.definition
-                FROM sys.triggers tr
-                INNER JOIN sys.tables t ON t.object_id = tr.parent_id
-                INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = tr.object_id
-                WHERE tr.is_ms_shipped = 0
-                ORDER BY s.name, t.name, tr.name
-            """)
-
-            rows = cursor.fetchall()
-
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- TRIGGERS\n")
-                f.write("-- =============================================\n\n")
-
-                for schema, table, trigger, definition in rows:
-                    f.write(f"IF OBJECT_ID('[{schema}].[{trigger}]', 'TR') IS NOT NULL DROP TRIGGER [{schema}].[{trigger}];\nGO\n")
-                    f.write(definition + "\nGO\n\n")
+            create_or_alter = supports_create_or_alter(cursor)
+            cursor.execute(_Q_TRIGGERS)
+
+            with open(script_file, 'ab', buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(_HEADER)
+
+                # Los triggers se leen por lotes y cada lote se escribe de una vez
+                for batch in iter(lambda: cursor.fetchmany(FETCH_SIZE), []):
+                    text = "".join([
+                        _trigger_script(schema, trigger, definition, create_or_alter)
+                        for schema, table, trigger, definition in batch
+                    ])
+                    f.write(text.encode('utf-8'))
 
             return True
 
@@ -1,6 +1,24 @@
 import pyodbc
 from pathlib import Path
 
+_HEADER = (
+    "\n-- =============================================\n"
+    "-- VIEWS\n"
+    "-- =============================================\n\n"
+)
+
+_Q_VIEWS = """
+    SELECT 
+        s.name AS schema_name,
+        v.name AS view_name,
+        m.definition
+    FROM sys.views v
+    INNER JOIN sys.schemas s ON s.schema_id = v.schema_id
+    INNER JOIN sys.sql_modules m ON m.object_id = v.object_id
+    ORDER BY s.name, v.name
+"""
+
+
 class ViewGenerator:
     def __init__(self, logger):
         self.logger = logger
@@ -10,16 +28,7 @@ class ViewGenerator:
         try:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT 
-                    s.name AS schema_name,
-                    v.name AS view_name,
-                    m.definition
-                FROM sys.views v
-                INNER JOIN sys.schemas s ON s.schema_id = v.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = v.object_id
-                ORDER BY s.name, v.name
-            """)
+            cursor.execute(_Q_VIEWS)
 
             rows = cursor.fetchall()
             if not rows:
@@ -27,9 +36,7 @@ class ViewGenerator:
                 return True
 
             with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- VIEWS\n")
-                f.write("-- =============================================\n\n")
+                f.write(_HEADER)
 
                 for schema, view, definition in rows:
                     f.write(
@@ -3,15 +3,58 @@ Estrategia de backup para SQL Server usando pyodbc
 Genera script SQL completo con estructura y datos
 Compatible con SQL Server 2008-2022
 """
+import gzip
+import os
+import tempfile
 import pyodbc
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional, TextIO
 from datetime import datetime
-from .base_strategy import BackupStrategy
-from ..models import DatabaseConfig, BackupResult
+from itertools import groupby
+from operator import itemgetter
+from .base_strategy import BackupStrategy, TEMP_SUFFIX
+from .sqlserver.connection_pool import ConnectionPool, SQL_ATTR_PACKET_SIZE, PACKET_SIZE
+from .sqlserver.data_generator import ROWS_PER_INSERT, column_formatters
+from .sqlserver.script_utils import append_file, drop_page_cache
+from ..models import DatabaseConfig, BackupResult, BackupSettings
+
+# Tablas cuyos datos se exportan a la vez por defecto, cada una con su propia
+# conexión (configurable con backup_settings.table_workers)
+TABLE_WORKERS = 4
+
+# INSERT de varias filas por lote GO (sqlcmd/SSMS cargan el lote entero en memoria)
+INSERTS_PER_GO = 10
+
+# Buffer de escritura del script (y de los temporales por tabla)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Nivel de compresión del script .gz: 6 es el de la herramienta gzip/pigz (la misma que
+# comprime los volcados de MySQL/PostgreSQL), no el 9 de gzip.open; equilibra velocidad y tamaño
+GZIP_LEVEL = 6
+
+
+def _quote_name(name: str) -> str:
+    """Cita un identificador entre corchetes escapando ']' (como QUOTENAME)"""
+    return "[" + name.replace("]", "]]") + "]"
 
 
 class SQLServerBackupStrategy(BackupStrategy):
     """Estrategia de backup para SQL Server usando pyodbc"""
+
+    def __init__(self):
+        """Inicializa la estrategia"""
+        super().__init__()
+        self.table_workers = TABLE_WORKERS
+
+    def configure(self, settings: BackupSettings):
+        """
+        Toma de la configuración cuántas tablas se exportan a la vez
+        
+        Args:
+            settings: Configuración de backups
+        """
+        self.table_workers = settings.table_workers
     
     def backup(self, db_config: DatabaseConfig, output_file: Path) -> BackupResult:
         """
@@ -19,25 +62,23 @@ class SQLServerBackupStrategy(BackupStrategy):
         """
         try:
             database_name = db_config.database or db_config.name
-            script_file = output_file.with_suffix('.sql')
+            # Con destino .gz el script se comprime en streaming mientras se escribe
+            compress = output_file.suffix == '.gz'
+            if compress:
+                output_file = output_file.with_suffix('')
+            script_file = output_file.with_suffix('.sql.gz' if compress else '.sql')
             
             self.logger.info(f"Generando backup SQL completo de: {database_name}")
             self.logger.info(f"Archivo destino: {script_file}")
 
-            # Validar credenciales
+            # Validar credenciales (las referencias ${VAR} ya se resolvieron al cargar
+            # la configuración; una variable inexistente llega aquí como cadena vacía)
             if not db_config.user or not db_config.password:
                 return BackupResult(
                     database_name=db_config.name,
                     success=False,
                     error="Usuario o contraseña no configurados"
                 )
-            
-            if '${' in db_config.user or '${' in db_config.password:
-                return BackupResult(
-                    database_name=db_config.name,
-                    success=False,
-                    error="Variables de entorno no resueltas"
-                )
 
             # Crear directorio
             script_file.parent.mkdir(parents=True, exist_ok=True)
@@ -51,9 +92,14 @@ class SQLServerBackupStrategy(BackupStrategy):
                     error="No se pudo conectar a SQL Server"
                 )
 
+            # El script se escribe en un .partial y se publica solo al terminar
+            final_file = script_file
+            script_file = self._partial_path(final_file)
+
             try:
-                # Encabezado general
-                with open(script_file, 'w', encoding='utf-8') as f:
+                # El script se abre una sola vez y todas las secciones escriben en él
+                with self._open_script(script_file, compress) as f:
+                    # Encabezado general
                     f.write("-- =============================================\n")
                     f.write(f"-- BACKUP DE BASE DE DATOS: {database_name}\n")
                     f.write(f"-- Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
@@ -61,42 +107,58 @@ class SQLServerBackupStrategy(BackupStrategy):
                     f.write("-- =============================================\n\n")
                     f.write("USE [{}];\nGO\n\n".format(database_name))
 
-                # 1. Estructura
-                self.logger.info("Paso 1/2: Generando estructura...")
-                if not self._generate_schema(conn, database_name, script_file):
-                    return BackupResult(database_name=db_config.name, success=False,
-                                       error="Error generando estructura")
-
-                # 2. Datos
-                self.logger.info("Paso 2/2: Generando datos...")
-                if not self._generate_data(conn, database_name, script_file):
-                    return BackupResult(database_name=db_config.name, success=False,
-                                       error="Error generando datos")
-
-                # 3. Extras
-                self.logger.info("Generando constraints y objetos adicionales...")
-                self._generate_defaults(conn, script_file)
-                self._generate_indexes(conn, script_file)
-                self._generate_stored_procedures(conn, script_file)
-                self._generate_foreign_keys(conn, script_file)
-                self._generate_triggers(conn, script_file)
-                self._generate_views(conn, script_file)
-                self._generate_functions(conn, script_file)
-                self._generate_types(conn, script_file)
-                self._generate_synonyms(conn, script_file)
-                self._generate_sequences(conn, script_file)
-                self._generate_schemas(conn, script_file)
-                self._generate_roles(conn, script_file)
-                self._generate_permissions(conn, script_file)
+                    # Tablas de usuario: una sola consulta para estructura y datos
+                    tables = self._list_tables(conn)
+
+                    # 1. Estructura
+                    self.logger.info("Paso 1/2: Generando estructura...")
+                    if not self._generate_schema(conn, tables, f):
+                        return BackupResult(database_name=db_config.name, success=False,
+                                           error="Error generando estructura")
+
+                    # 2. Datos
+                    self.logger.info("Paso 2/2: Generando datos...")
+                    if not self._generate_data(conn, tables, f,
+                                               lambda: self._connect_or_raise(db_config, database_name)):
+                        return BackupResult(database_name=db_config.name, success=False,
+                                           error="Error generando datos")
+
+                    # 3. Extras
+                    self.logger.info("Generando constraints y objetos adicionales...")
+                    self._generate_defaults(conn, f)
+                    self._generate_indexes(conn, f)
+
+                    # Procedimientos, triggers, vistas y funciones: una sola consulta
+                    modules = self._fetch_modules(conn)
+                    if modules is None:
+                        return BackupResult(database_name=db_config.name, success=False,
+                                           error="Error leyendo módulos")
+                    self._generate_stored_procedures(modules.get('P', []), f)
+                    self._generate_foreign_keys(conn, f)
+                    self._generate_triggers(modules.get('TR', []), f)
+                    self._generate_views(modules.get('V', []), f)
+                    self._generate_functions(modules.get('FN', []), f)
+                    self._generate_types(conn, f)
+                    self._generate_synonyms(conn, f)
+                    self._generate_sequences(conn, f)
+                    self._generate_schemas(conn, f)
+                    self._generate_roles(conn, f)
+                    self._generate_permissions(conn, f)
                 
-                file_size = script_file.stat().st_size / (1024 * 1024)
-                self.logger.info(f"✓ Backup completado: {script_file.name} ({file_size:.2f} MB)")
+                # El script no se vuelve a leer aquí: que no desplace al resto del page cache
+                drop_page_cache(script_file)
+                os.replace(script_file, final_file)
+                
+                size_bytes = final_file.stat().st_size
+                self.logger.info(f"✓ Backup completado: {final_file.name} ({size_bytes / (1024 * 1024):.2f} MB)")
                 
                 return BackupResult(database_name=db_config.name, success=True,
-                                    output_file=str(script_file))
+                                    output_file=str(final_file), size_bytes=size_bytes)
 
             finally:
                 conn.close()
+                # Si el backup no terminó, descartar el archivo incompleto
+                script_file.unlink(missing_ok=True)
 
         except Exception as e:
             self.logger.error(f"Error: {e}")
@@ -108,9 +170,11 @@ class SQLServerBackupStrategy(BackupStrategy):
     def _connect(self, db_config: DatabaseConfig, database_name: str):
         """Conecta a SQL Server"""
         try:
+            # Puerto por defecto implícito; otro puerto va como host,puerto
+            server = db_config.host if db_config.port == 1433 else f"{db_config.host},{db_config.port}"
             conn_str = (
                 f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={db_config.host};"
+                f"SERVER={server};"
                 f"DATABASE={database_name};"
                 f"UID={db_config.user};"
                 f"PWD={db_config.password};"
@@ -118,7 +182,10 @@ class SQLServerBackupStrategy(BackupStrategy):
             )
             
             self.logger.info(f"Conectando a: {db_config.host}")
-            conn = pyodbc.connect(conn_str, timeout=30)
+            # Paquetes TDS grandes: menos viajes de red al leer los datos.
+            # Solo se lee: autocommit evita abrir una transacción implícita
+            conn = pyodbc.connect(conn_str, timeout=30, autocommit=True,
+                                  attrs_before={SQL_ATTR_PACKET_SIZE: PACKET_SIZE})
             self.logger.info("✓ Conexión establecida")
             return conn
             
@@ -127,104 +194,162 @@ class SQLServerBackupStrategy(BackupStrategy):
             return None
 
 
-    def _generate_schema(self, conn, database_name: str, script_file: Path) -> bool:
+    @staticmethod
+    def _open_script(path: Path, compress: bool) -> TextIO:
+        """
+        Abre el script para escritura
+        
+        Args:
+            path: Archivo del script
+            compress: Si es True se escribe comprimido con gzip
+            
+        Returns:
+            Archivo de texto UTF-8 abierto para escritura
+        """
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8', compresslevel=GZIP_LEVEL)
+        return open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+
+    def _connect_or_raise(self, db_config: DatabaseConfig, database_name: str):
+        """Conecta a SQL Server; lanza ConnectionError si no es posible"""
+        conn = self._connect(db_config, database_name)
+        if not conn:
+            raise ConnectionError("No se pudo conectar a SQL Server")
+        return conn
+
+
+    def _list_tables(self, conn) -> list:
+        """
+        Obtiene las tablas de usuario ordenadas por esquema y nombre
+        
+        Args:
+            conn: Conexión a la base de datos
+            
+        Returns:
+            Lista de filas (object_id, esquema, tabla, tiene_identidad, filas)
+        """
+        cursor = conn.cursor()
+        # Filas según el catálogo (heap o índice clustered): evita un COUNT(*) por tabla
+        cursor.execute("""
+            SELECT 
+                t.object_id,
+                s.name,
+                t.name,
+                CASE WHEN EXISTS (
+                    SELECT 1 FROM sys.columns c
+                    WHERE c.object_id = t.object_id AND c.is_identity = 1
+                ) THEN 1 ELSE 0 END,
+                ISNULL((
+                    SELECT SUM(p.rows) FROM sys.partitions p
+                    WHERE p.object_id = t.object_id AND p.index_id IN (0, 1)
+                ), 0)
+            FROM sys.tables t
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            WHERE t.is_ms_shipped = 0
+            ORDER BY s.name, t.name
+        """)
+        return cursor.fetchall()
+
+
+    def _generate_schema(self, conn, tables: list, f: TextIO) -> bool:
         """Genera estructura de la BD (compatible SQL 2008+)"""
         try:
             cursor = conn.cursor()
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("-- =============================================\n")
-                f.write("-- ESTRUCTURA DE LA BASE DE DATOS\n")
-                f.write("-- =============================================\n\n")
+            f.write("-- =============================================\n")
+            f.write("-- ESTRUCTURA DE LA BASE DE DATOS\n")
+            f.write("-- =============================================\n\n")
 
-            cursor.execute("""
-                SELECT s.name, t.name
-                FROM sys.tables t
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE t.is_ms_shipped = 0
-                ORDER BY s.name, t.name
-            """)
-            
-            tables = cursor.fetchall()
             if not tables:
                 return True
 
             self.logger.info(f"  Exportando estructura de {len(tables)} tablas...")
 
-            for i, (schema, table) in enumerate(tables, 1):
+            # Columnas de todas las tablas en una sola consulta
+            cursor.execute("""
+                SELECT 
+                    c.object_id,
+                    c.name,
+                    TYPE_NAME(c.user_type_id),
+                    c.max_length,
+                    c.precision,
+                    c.scale,
+                    c.is_nullable,
+                    c.is_identity
+                FROM sys.columns c
+                INNER JOIN sys.tables t ON t.object_id = c.object_id
+                WHERE t.is_ms_shipped = 0
+                ORDER BY c.object_id, c.column_id
+            """)
+
+            columns_by_table = {
+                object_id: [col[1:] for col in cols]
+                for object_id, cols in groupby(cursor.fetchall(), key=itemgetter(0))
+            }
+
+            # PRIMARY KEY de todas las tablas usando FOR XML PATH (compatible con SQL 2008+)
+            cursor.execute("""
+                SELECT 
+                    i.object_id,
+                    i.name,
+                    STUFF((
+                        SELECT ', ' + c.name
+                        FROM sys.index_columns ic2
+                        INNER JOIN sys.columns c 
+                            ON ic2.object_id = c.object_id 
+                            AND ic2.column_id = c.column_id
+                        WHERE ic2.object_id = i.object_id
+                            AND ic2.index_id = i.index_id
+                        ORDER BY ic2.key_ordinal
+                        FOR XML PATH(''), TYPE
+                    ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') as columns
+                FROM sys.indexes i
+                INNER JOIN sys.tables t ON t.object_id = i.object_id
+                WHERE t.is_ms_shipped = 0
+                AND i.is_primary_key = 1
+            """)
+
+            pk_by_table = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+            for i, (object_id, schema, table, *_) in enumerate(tables, 1):
                 self.logger.info(f"    [{i}/{len(tables)}] {schema}.{table}")
 
-                with open(script_file, 'a', encoding='utf-8') as f:
-                    f.write(f"\n-- Tabla: [{schema}].[{table}]\n")
-                    f.write(f"IF OBJECT_ID('[{schema}].[{table}]', 'U') IS NOT NULL\n")
-                    f.write(f"    DROP TABLE [{schema}].[{table}];\nGO\n\n")
-
-                    # Obtener columnas
-                    cursor.execute(f"""
-                        SELECT 
-                            c.name,
-                            TYPE_NAME(c.user_type_id),
-                            c.max_length,
-                            c.precision,
-                            c.scale,
-                            c.is_nullable,
-                            c.is_identity
-                        FROM sys.columns c
-                        WHERE c.object_id = OBJECT_ID('[{schema}].[{table}]')
-                        ORDER BY c.column_id
-                    """)
-
-                    columns = cursor.fetchall()
-
-                    f.write(f"CREATE TABLE [{schema}].[{table}] (\n")
-
-                    for j, col in enumerate(columns):
-                        col_name, type_name, max_len, precision, scale, nullable, is_identity = col
-
-                        if type_name in ('varchar', 'char', 'varbinary', 'binary'):
-                            type_str = f"{type_name}({max_len if max_len != -1 else 'MAX'})"
-                        elif type_name in ('nvarchar', 'nchar'):
-                            type_str = f"{type_name}({max_len//2 if max_len != -1 else 'MAX'})"
-                        elif type_name in ('decimal', 'numeric'):
-                            type_str = f"{type_name}({precision},{scale})"
-                        else:
-                            type_str = type_name
-                        
-                        identity_str = " IDENTITY(1,1)" if is_identity else ""
-                        null_str = " NULL" if nullable else " NOT NULL"
-                        comma = "," if j < len(columns) - 1 else ""
-
-                        f.write(f"    [{col_name}] {type_str}{identity_str}{null_str}{comma}\n")
-
-                    f.write(");\nGO\n\n")
-
-                    # PRIMARY KEY usando FOR XML PATH (compatible con SQL 2008+)
-                    cursor.execute(f"""
-                        SELECT 
-                            i.name,
-                            STUFF((
-                                SELECT ', ' + c.name
-                                FROM sys.index_columns ic2
-                                INNER JOIN sys.columns c 
-                                    ON ic2.object_id = c.object_id 
-                                    AND ic2.column_id = c.column_id
-                                WHERE ic2.object_id = i.object_id
-                                    AND ic2.index_id = i.index_id
-                                ORDER BY ic2.key_ordinal
-                                FOR XML PATH(''), TYPE
-                            ).value('.', 'NVARCHAR(MAX)'), 1, 2, '') as columns
-                        FROM sys.indexes i
-                        WHERE i.object_id = OBJECT_ID('[{schema}].[{table}]')
-                        AND i.is_primary_key = 1
-                    """)
-
-                    pk = cursor.fetchone()
-                    if pk and pk[1]:
-                        pk_name, cols = pk
-                        f.write(
-                            f"ALTER TABLE [{schema}].[{table}]\n"
-                            f"    ADD CONSTRAINT [{pk_name}] PRIMARY KEY CLUSTERED ({cols});\nGO\n\n"
-                        )
+                # Definiciones de columna unidas con ",\n": una sola escritura por tabla
+                lines = []
+                for col in columns_by_table.get(object_id, []):
+                    col_name, type_name, max_len, precision, scale, nullable, is_identity = col
+
+                    if type_name in ('varchar', 'char', 'varbinary', 'binary'):
+                        type_str = f"{type_name}({max_len if max_len != -1 else 'MAX'})"
+                    elif type_name in ('nvarchar', 'nchar'):
+                        type_str = f"{type_name}({max_len//2 if max_len != -1 else 'MAX'})"
+                    elif type_name in ('decimal', 'numeric'):
+                        type_str = f"{type_name}({precision},{scale})"
+                    else:
+                        type_str = type_name
+                    
+                    identity_str = " IDENTITY(1,1)" if is_identity else ""
+                    null_str = " NULL" if nullable else " NOT NULL"
+
+                    lines.append(f"    [{col_name}] {type_str}{identity_str}{null_str}")
+
+                f.write(
+                    f"\n-- Tabla: [{schema}].[{table}]\n"
+                    f"IF OBJECT_ID('[{schema}].[{table}]', 'U') IS NOT NULL\n"
+                    f"    DROP TABLE [{schema}].[{table}];\nGO\n\n"
+                    f"CREATE TABLE [{schema}].[{table}] (\n"
+                    + ",\n".join(lines) +
+                    "\n);\nGO\n\n"
+                )
+
+                pk = pk_by_table.get(object_id)
+                if pk and pk[1]:
+                    pk_name, cols = pk
+                    f.write(
+                        f"ALTER TABLE [{schema}].[{table}]\n"
+                        f"    ADD CONSTRAINT [{pk_name}] PRIMARY KEY CLUSTERED ({cols});\nGO\n\n"
+                    )
 
             return True
         
@@ -235,96 +360,36 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_data(self, conn, database_name: str, script_file: Path) -> bool:
-        """Genera datos de todas las tablas"""
+    def _generate_data(self, conn, tables: list, f: TextIO, connect=None) -> bool:
+        """
+        Genera datos de todas las tablas
+        
+        Args:
+            conn: Conexión principal
+            tables: Tablas obtenidas con _list_tables
+            f: Archivo del script
+            connect: Función que abre una conexión nueva; si se indica,
+                las tablas se exportan en paralelo (opcional)
+        """
         try:
             cursor = conn.cursor()
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- DATOS DE LAS TABLAS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- DATOS DE LAS TABLAS\n")
+            f.write("-- =============================================\n\n")
 
-            cursor.execute("""
-                SELECT s.name, t.name
-                FROM sys.tables t
-                INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
-                WHERE t.is_ms_shipped = 0
-                ORDER BY s.name, t.name
-            """)
-
-            tables = cursor.fetchall()
             if not tables:
                 return True
 
-            for i, (schema, table) in enumerate(tables, 1):
-                full = f"{schema}.{table}"
-                self.logger.info(f"    [{i}/{len(tables)}] {full}")
-
-                cursor.execute(f"SELECT COUNT(*) FROM [{schema}].[{table}]")
-                total = cursor.fetchone()[0]
-
-                if total == 0:
-                    continue
-
-                cursor.execute(f"""
-                    SELECT c.name 
-                    FROM sys.columns c
-                    WHERE c.object_id = OBJECT_ID('[{schema}].[{table}]')
-                    ORDER BY c.column_id
-                """)
-                col_names = [c[0] for c in cursor.fetchall()]
-
-                cursor.execute(f"""
-                    SELECT COUNT(*) 
-                    FROM sys.columns 
-                    WHERE object_id = OBJECT_ID('[{schema}].[{table}]')
-                    AND is_identity = 1
-                """)
-                has_identity = cursor.fetchone()[0] > 0
-
-                cursor.execute(f"SELECT * FROM [{schema}].[{table}]")
-                rows = cursor.fetchall()
-
-                with open(script_file, 'a', encoding='utf-8') as f:
-                    f.write(f"\n-- Datos de [{schema}].[{table}] ({total} registros)\n")
-
-                    if has_identity:
-                        f.write(f"SET IDENTITY_INSERT [{schema}].[{table}] ON;\n")
-
-                    batch_size = 400
-
-                    for batch_start in range(0, len(rows), batch_size):
-                        batch = rows[batch_start:batch_start + batch_size]
-
-                        for row in batch:
-                            values = []
-
-                            for v in row:
-                                if v is None:
-                                    values.append("NULL")
-                                elif isinstance(v, str):
-                                    values.append("'" + v.replace("'", "''") + "'")
-                                elif hasattr(v, "isoformat"):
-                                    values.append(f"'{v}'")
-                                elif isinstance(v, (bytes, bytearray)):
-                                    values.append("0x" + v.hex() if v else "NULL")
-                                elif isinstance(v, bool):
-                                    values.append("1" if v else "0")
-                                else:
-                                    values.append(str(v))
-
-                            cols = ", ".join(f"[{c}]" for c in col_names)
-                            vals = ", ".join(values)
-
-                            f.write(f"INSERT INTO [{schema}].[{table}] ({cols}) VALUES ({vals});\n")
-
-                        f.write("GO\n")
-
-                    if has_identity:
-                        f.write(f"SET IDENTITY_INSERT [{schema}].[{table}] OFF;\n")
+            # Sin mensajes "filas afectadas" por cada INSERT al restaurar
+            f.write("SET NOCOUNT ON;\nGO\n")
 
-                    f.write("\n")
+            if connect is None or self.table_workers <= 1 or len(tables) == 1:
+                for i, (_, schema, table, has_identity, row_count) in enumerate(tables, 1):
+                    self._export_table_data(cursor, schema, table, has_identity, row_count,
+                                            i, len(tables), f)
+            else:
+                self._export_data_parallel(tables, connect, f)
 
             return True
 
@@ -335,7 +400,93 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_defaults(self, conn, script_file: Path):
+    def _export_data_parallel(self, tables, connect, f: TextIO):
+        """Exporta cada tabla a un temporal con su propia conexión y los une en orden"""
+        pool = ConnectionPool(connect, self.table_workers)
+        created = []
+
+        def export(i, _, schema, table, has_identity, row_count):
+            fd, name = tempfile.mkstemp(dir=Path(f.name).parent, suffix=TEMP_SUFFIX)
+            tmp_path = Path(name)
+            created.append(tmp_path)
+            # El descriptor se envuelve antes de conectar para que se cierre si falla la conexión
+            with open(fd, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as tmp, \
+                    pool.acquire() as conn:
+                self._export_table_data(conn.cursor(), schema, table, has_identity, row_count,
+                                        i, len(tables), tmp)
+            return tmp_path
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.table_workers) as ex:
+                futures = [ex.submit(export, i, *row) for i, row in enumerate(tables, 1)]
+                try:
+                    # Se añaden al script en el orden original a medida que terminan
+                    for future in futures:
+                        tmp_path = future.result()
+                        f.flush()
+                        append_file(f.buffer, tmp_path)
+                        tmp_path.unlink()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            pool.close()
+            for tmp_path in created:
+                tmp_path.unlink(missing_ok=True)
+
+
+    def _export_table_data(self, cursor, schema: str, table: str, has_identity: bool,
+                           row_count: int, i: int, total_tables: int, f: TextIO):
+        """Escribe en f los INSERT de una tabla"""
+        full = f"{schema}.{table}"
+        self.logger.info(f"    [{i}/{total_tables}] {full}")
+
+        # Los identificadores no admiten parámetros: se escapan al citarlos, tanto en
+        # la lectura como en cada sentencia que se escribe en el script
+        source = f"{_quote_name(schema)}.{_quote_name(table)}"
+
+        cursor.execute(f"SELECT * FROM {source}")
+
+        # Una tabla vacía se detecta con el primer lote, no con el conteo del catálogo
+        batch = cursor.fetchmany(ROWS_PER_INSERT)
+        if not batch:
+            return
+
+        # Los nombres de columna vienen en el propio resultado (orden de column_id)
+        cols = ", ".join(_quote_name(col[0]) for col in cursor.description)
+        insert_prefix = f"INSERT INTO {source} ({cols}) VALUES\n"
+        # Un formateador por columna según su tipo, elegido una sola vez por tabla
+        formatters = column_formatters(cursor.description)
+
+        f.write(f"\n-- Datos de {source} ({row_count} registros)\n")
+
+        if has_identity:
+            f.write(f"SET IDENTITY_INSERT {source} ON;\n")
+
+        # Cada lote leído se escribe como un único INSERT de varias filas
+        pending = 0
+        while batch:
+            values = ",\n".join([
+                "(" + ", ".join([fmt(v) for fmt, v in zip(formatters, row)]) + ")"
+                for row in batch
+            ])
+            f.write(f"{insert_prefix}{values};\n")
+            pending += 1
+            if pending == INSERTS_PER_GO:
+                f.write("GO\n")
+                pending = 0
+            batch = cursor.fetchmany(ROWS_PER_INSERT)
+
+        if has_identity:
+            f.write(f"SET IDENTITY_INSERT {source} OFF;\n")
+
+        if pending or has_identity:
+            f.write("GO\n")
+        f.write("\n")
+
+
+    def _generate_defaults(self, conn, f: TextIO):
         """Genera DEFAULT constraints"""
         try:
             cursor = conn.cursor()
@@ -357,16 +508,15 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- DEFAULT CONSTRAINTS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- DEFAULT CONSTRAINTS\n")
+            f.write("-- =============================================\n\n")
 
-                for def_name, schema, table, col, definition in rows:
-                    f.write(
-                        f"ALTER TABLE [{schema}].[{table}] "
-                        f"ADD CONSTRAINT [{def_name}] DEFAULT {definition} FOR [{col}];\nGO\n"
-                    )
+            for def_name, schema, table, col, definition in rows:
+                f.write(
+                    f"ALTER TABLE [{schema}].[{table}] "
+                    f"ADD CONSTRAINT [{def_name}] DEFAULT {definition} FOR [{col}];\nGO\n"
+                )
 
             return True
         except Exception as e:
@@ -374,7 +524,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_indexes(self, conn, script_file: Path):
+    def _generate_indexes(self, conn, f: TextIO):
         """Genera índices (compatible SQL 2008+)"""
         try:
             cursor = conn.cursor()
@@ -408,17 +558,16 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- INDICES\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- INDICES\n")
+            f.write("-- =============================================\n\n")
 
-                for idx_name, schema, table, cols in rows:
-                    if cols:  # Solo si tiene columnas
-                        f.write(
-                            f"CREATE INDEX [{idx_name}] ON "
-                            f"[{schema}].[{table}] ({cols});\nGO\n"
-                        )
+            for idx_name, schema, table, cols in rows:
+                if cols:  # Solo si tiene columnas
+                    f.write(
+                        f"CREATE INDEX [{idx_name}] ON "
+                        f"[{schema}].[{table}] ({cols});\nGO\n"
+                    )
 
             return True
 
@@ -427,35 +576,62 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_stored_procedures(self, conn, script_file: Path):
-        """Genera procedimientos almacenados"""
+    def _fetch_modules(self, conn) -> Optional[dict]:
+        """
+        Obtiene en una sola consulta los módulos SQL exportados como definición
+        
+        Args:
+            conn: Conexión a la base de datos
+            
+        Returns:
+            Diccionario 'P' | 'TR' | 'V' | 'FN' -> lista de
+            (esquema, nombre, definición, tipo), en el orden de cada sección,
+            o None si la consulta falla
+        """
         try:
             cursor = conn.cursor()
 
+            # Solo triggers de tabla (como sys.triggers con parent_class = 1)
             cursor.execute("""
                 SELECT 
+                    RTRIM(o.type),
                     s.name,
-                    p.name,
+                    o.name,
                     m.definition
-                FROM sys.procedures p
-                INNER JOIN sys.schemas s ON s.schema_id = p.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = p.object_id
-                ORDER BY s.name, p.name
+                FROM sys.sql_modules m
+                INNER JOIN sys.objects o ON o.object_id = m.object_id
+                INNER JOIN sys.schemas s ON s.schema_id = o.schema_id
+                WHERE o.type IN ('P', 'V', 'FN', 'IF', 'TF')
+                   OR (o.type = 'TR' AND o.is_ms_shipped = 0
+                       AND o.parent_object_id IN (SELECT object_id FROM sys.tables))
+                ORDER BY s.name, OBJECT_NAME(o.parent_object_id), o.name
             """)
 
-            rows = cursor.fetchall()
+            modules = {}
+            for otype, schema, name, definition in cursor.fetchall():
+                section = 'FN' if otype in ('IF', 'TF') else otype
+                modules.setdefault(section, []).append((schema, name, definition, otype))
+            return modules
+
+        except Exception as e:
+            self.logger.error(f"Error leyendo módulos: {e}")
+            return None
+
+
+    def _generate_stored_procedures(self, rows: list, f: TextIO):
+        """Genera procedimientos almacenados"""
+        try:
             if not rows:
                 return True
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- STORED PROCEDURES\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- STORED PROCEDURES\n")
+            f.write("-- =============================================\n\n")
 
-                for schema, name, definition in rows:
-                    f.write(f"IF OBJECT_ID('[{schema}].[{name}]', 'P') IS NOT NULL\n")
-                    f.write(f"    DROP PROCEDURE [{schema}].[{name}];\nGO\n\n")
-                    f.write(definition + "\nGO\n\n")
+            for schema, name, definition, _ in rows:
+                f.write(f"IF OBJECT_ID('[{schema}].[{name}]', 'P') IS NOT NULL\n")
+                f.write(f"    DROP PROCEDURE [{schema}].[{name}];\nGO\n\n")
+                f.write(definition + "\nGO\n\n")
 
             return True
         except Exception as e:
@@ -463,7 +639,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_foreign_keys(self, conn, script_file: Path):
+    def _generate_foreign_keys(self, conn, f: TextIO):
         """Genera Foreign Keys"""
         try:
             cursor = conn.cursor()
@@ -507,20 +683,19 @@ class SQLServerBackupStrategy(BackupStrategy):
                 key = (fk_name, schema, table, ref_s, ref_t)
                 fk_map.setdefault(key, []).append((col, ref_c))
 
-            with open(script_file, 'a', encoding='utf-8') as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- FOREIGN KEYS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- FOREIGN KEYS\n")
+            f.write("-- =============================================\n\n")
 
-                for (fk_name, schema, table, ref_s, ref_t), cols in fk_map.items():
-                    parent_cols = ", ".join(f"[{c}]" for c, _ in cols)
-                    ref_cols = ", ".join(f"[{c}]" for _, c in cols)
+            for (fk_name, schema, table, ref_s, ref_t), cols in fk_map.items():
+                parent_cols = ", ".join(f"[{c}]" for c, _ in cols)
+                ref_cols = ", ".join(f"[{c}]" for _, c in cols)
 
-                    f.write(
-                        f"ALTER TABLE [{schema}].[{table}] WITH CHECK "
-                        f"ADD CONSTRAINT [{fk_name}] FOREIGN KEY ({parent_cols}) "
-                        f"REFERENCES [{ref_s}].[{ref_t}] ({ref_cols});\nGO\n"
-                    )
+                f.write(
+                    f"ALTER TABLE [{schema}].[{table}] WITH CHECK "
+                    f"ADD CONSTRAINT [{fk_name}] FOREIGN KEY ({parent_cols}) "
+                    f"REFERENCES [{ref_s}].[{ref_t}] ({ref_cols});\nGO\n"
+                )
 
             return True
 
@@ -529,39 +704,20 @@ class SQLServerBackupStrategy(BackupStrategy):
             return False
 
 
-    def _generate_triggers(self, conn, script_file: Path):
+    def _generate_triggers(self, rows: list, f: TextIO):
         """Genera triggers"""
         try:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT 
-                    s.name,
-                    t.name,
-                    tr.name,
-                    m.definition
-                FROM sys.triggers tr
-                INNER JOIN sys.tables t ON t.object_id = tr.parent_id
-                INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = tr.object_id
-                WHERE tr.is_ms_shipped = 0
-                AND tr.parent_class = 1
-                ORDER BY s.name, t.name, tr.name
-            """)
-
-            rows = cursor.fetchall()
             if not rows:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- TRIGGERS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- TRIGGERS\n")
+            f.write("-- =============================================\n\n")
 
-                for schema, table, trigger, definition in rows:
-                    f.write(f"IF OBJECT_ID('[{schema}].[{trigger}]', 'TR') IS NOT NULL\n")
-                    f.write(f"    DROP TRIGGER [{schema}].[{trigger}];\nGO\n\n")
-                    f.write(definition + "\nGO\n\n")
+            for schema, trigger, definition, _ in rows:
+                f.write(f"IF OBJECT_ID('[{schema}].[{trigger}]', 'TR') IS NOT NULL\n")
+                f.write(f"    DROP TRIGGER [{schema}].[{trigger}];\nGO\n\n")
+                f.write(definition + "\nGO\n\n")
 
             return True
 
@@ -569,38 +725,23 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.warning(f"Error generando TRIGGERS: {e}")
             return False
 
-    def _generate_views(self, conn, script_file: Path):
+    def _generate_views(self, rows: list, f: TextIO):
         """Genera todas las VIEWS de la base de datos"""
         try:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT 
-                    s.name AS schema_name,
-                    v.name AS view_name,
-                    m.definition
-                FROM sys.views v
-                INNER JOIN sys.schemas s ON s.schema_id = v.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = v.object_id
-                ORDER BY s.name, v.name
-            """)
-
-            rows = cursor.fetchall()
             if not rows:
                 self.logger.info("No se encontraron VIEWS.")
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- VIEWS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- VIEWS\n")
+            f.write("-- =============================================\n\n")
 
-                for schema, view, definition in rows:
-                    f.write(
-                        f"IF OBJECT_ID('[{schema}].[{view}]', 'V') IS NOT NULL\n"
-                        f"    DROP VIEW [{schema}].[{view}];\nGO\n\n"
-                    )
-                    f.write(definition + "\nGO\n\n")
+            for schema, view, definition, _ in rows:
+                f.write(
+                    f"IF OBJECT_ID('[{schema}].[{view}]', 'V') IS NOT NULL\n"
+                    f"    DROP VIEW [{schema}].[{view}];\nGO\n\n"
+                )
+                f.write(definition + "\nGO\n\n")
 
             self.logger.info(f"✓ Exportadas {len(rows)} views")
 
@@ -610,46 +751,29 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error(f"Error generando views: {e}")
             return False
 
-    def _generate_functions(self, conn, script_file: Path):
+    def _generate_functions(self, rows: list, f: TextIO):
         """Genera SCALAR + TABLE-VALUED FUNCTIONS"""
         try:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT 
-                    s.name AS schema_name,
-                    o.name AS func_name,
-                    m.definition,
-                    o.type
-                FROM sys.objects o
-                INNER JOIN sys.schemas s ON s.schema_id = o.schema_id
-                INNER JOIN sys.sql_modules m ON m.object_id = o.object_id
-                WHERE o.type IN ('FN', 'IF', 'TF')
-                ORDER BY s.name, o.name
-            """)
-
-            rows = cursor.fetchall()
             if not rows:
                 self.logger.info("No se encontraron FUNCTIONS.")
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- FUNCTIONS\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- FUNCTIONS\n")
+            f.write("-- =============================================\n\n")
 
-                for schema, name, definition, ftype in rows:
-                    drop_map = {
-                        "FN": "FUNCTION",
-                        "IF": "FUNCTION",
-                        "TF": "FUNCTION"
-                    }
+            for schema, name, definition, ftype in rows:
+                drop_map = {
+                    "FN": "FUNCTION",
+                    "IF": "FUNCTION",
+                    "TF": "FUNCTION"
+                }
 
-                    f.write(
-                        f"IF OBJECT_ID('[{schema}].[{name}]', '{ftype}') IS NOT NULL\n"
-                        f"    DROP {drop_map[ftype]} [{schema}].[{name}];\nGO\n\n"
-                    )
-                    f.write(definition + "\nGO\n\n")
+                f.write(
+                    f"IF OBJECT_ID('[{schema}].[{name}]', '{ftype}') IS NOT NULL\n"
+                    f"    DROP {drop_map[ftype]} [{schema}].[{name}];\nGO\n\n"
+                )
+                f.write(definition + "\nGO\n\n")
 
             self.logger.info(f"✓ Exportadas {len(rows)} funciones")
 
@@ -659,7 +783,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error(f"Error generando funciones: {e}")
             return False
 
-    def _generate_types(self, conn, script_file: Path):
+    def _generate_types(self, conn, f: TextIO):
         """Genera USER-DEFINED TYPES"""
         try:
             cursor = conn.cursor()
@@ -683,26 +807,25 @@ class SQLServerBackupStrategy(BackupStrategy):
                 self.logger.info("No se encontraron TYPES.")
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- =============================================\n")
-                f.write("-- USER DEFINED TYPES\n")
-                f.write("-- =============================================\n\n")
+            f.write("\n-- =============================================\n")
+            f.write("-- USER DEFINED TYPES\n")
+            f.write("-- =============================================\n\n")
 
-                for schema, name, base, maxlen, prec, scale in rows:
-                    f.write(
-                        f"DROP TYPE IF EXISTS [{schema}].[{name}];\nGO\n"
-                    )
+            for schema, name, base, maxlen, prec, scale in rows:
+                f.write(
+                    f"DROP TYPE IF EXISTS [{schema}].[{name}];\nGO\n"
+                )
 
-                    if maxlen > 0:
-                        type_def = f"{base}({maxlen})"
-                    elif prec > 0:
-                        type_def = f"{base}({prec},{scale})"
-                    else:
-                        type_def = base
+                if maxlen > 0:
+                    type_def = f"{base}({maxlen})"
+                elif prec > 0:
+                    type_def = f"{base}({prec},{scale})"
+                else:
+                    type_def = base
 
-                    f.write(
-                        f"CREATE TYPE [{schema}].[{name}] FROM {type_def};\nGO\n\n"
-                    )
+                f.write(
+                    f"CREATE TYPE [{schema}].[{name}] FROM {type_def};\nGO\n\n"
+                )
 
             self.logger.info(f"✓ Exportados {len(rows)} tipos")
 
@@ -712,7 +835,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error(f"Error generando types: {e}")
             return False
 
-    def _generate_synonyms(self, conn, script_file: Path):
+    def _generate_synonyms(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -730,14 +853,13 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- SYNONYMS\n\n")
+            f.write("\n-- SYNONYMS\n\n")
 
-                for schema, name, target in rows:
-                    f.write(
-                        f"DROP SYNONYM IF EXISTS [{schema}].[{name}];\nGO\n"
-                        f"CREATE SYNONYM [{schema}].[{name}] FOR {target};\nGO\n\n"
-                    )
+            for schema, name, target in rows:
+                f.write(
+                    f"DROP SYNONYM IF EXISTS [{schema}].[{name}];\nGO\n"
+                    f"CREATE SYNONYM [{schema}].[{name}] FOR {target};\nGO\n\n"
+                )
 
             return True
 
@@ -745,7 +867,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error(f"Error generando synonyms: {e}")
             return False
 
-    def _generate_sequences(self, conn, script_file: Path):
+    def _generate_sequences(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -768,23 +890,22 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- SEQUENCES\n\n")
+            f.write("\n-- SEQUENCES\n\n")
 
-                for schema, name, start, inc, minv, maxv, cycle, cache in rows:
+            for schema, name, start, inc, minv, maxv, cycle, cache in rows:
 
-                    cycle_str = "CYCLE" if cycle else "NO CYCLE"
+                cycle_str = "CYCLE" if cycle else "NO CYCLE"
 
-                    f.write(
-                        f"DROP SEQUENCE IF EXISTS [{schema}].[{name}];\nGO\n"
-                        f"CREATE SEQUENCE [{schema}].[{name}]\n"
-                        f"    START WITH {start}\n"
-                        f"    INCREMENT BY {inc}\n"
-                        f"    MINVALUE {minv}\n"
-                        f"    MAXVALUE {maxv}\n"
-                        f"    {cycle_str}\n"
-                        f"    CACHE {cache};\nGO\n\n"
-                    )
+                f.write(
+                    f"DROP SEQUENCE IF EXISTS [{schema}].[{name}];\nGO\n"
+                    f"CREATE SEQUENCE [{schema}].[{name}]\n"
+                    f"    START WITH {start}\n"
+                    f"    INCREMENT BY {inc}\n"
+                    f"    MINVALUE {minv}\n"
+                    f"    MAXVALUE {maxv}\n"
+                    f"    {cycle_str}\n"
+                    f"    CACHE {cache};\nGO\n\n"
+                )
 
             return True
 
@@ -792,7 +913,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error("Error generando sequences: " + str(e))
             return False
 
-    def _generate_sequences(self, conn, script_file: Path):
+    def _generate_sequences(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -815,21 +936,20 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- SEQUENCES\n\n")
-
-                for schema, name, start, inc, minv, maxv, cycle, cache in rows:
-                    cycle_str = "CYCLE" if cycle else "NO CYCLE"
-                    f.write(
-                        f"DROP SEQUENCE IF EXISTS [{schema}].[{name}];\nGO\n"
-                        f"CREATE SEQUENCE [{schema}].[{name}]\n"
-                        f"    START WITH {start}\n"
-                        f"    INCREMENT BY {inc}\n"
-                        f"    MINVALUE {minv}\n"
-                        f"    MAXVALUE {maxv}\n"
-                        f"    {cycle_str}\n"
-                        f"    CACHE {cache};\nGO\n\n"
-                    )
+            f.write("\n-- SEQUENCES\n\n")
+
+            for schema, name, start, inc, minv, maxv, cycle, cache in rows:
+                cycle_str = "CYCLE" if cycle else "NO CYCLE"
+                f.write(
+                    f"DROP SEQUENCE IF EXISTS [{schema}].[{name}];\nGO\n"
+                    f"CREATE SEQUENCE [{schema}].[{name}]\n"
+                    f"    START WITH {start}\n"
+                    f"    INCREMENT BY {inc}\n"
+                    f"    MINVALUE {minv}\n"
+                    f"    MAXVALUE {maxv}\n"
+                    f"    {cycle_str}\n"
+                    f"    CACHE {cache};\nGO\n\n"
+                )
 
             return True
 
@@ -837,7 +957,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error("Error generando sequences: " + str(e))
             return False
 
-    def _generate_schemas(self, conn, script_file: Path):
+    def _generate_schemas(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -853,14 +973,13 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not schemas:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- SCHEMAS\n\n")
+            f.write("\n-- SCHEMAS\n\n")
 
-                for schema in schemas:
-                    f.write(
-                        f"IF NOT EXISTS (SELECT 1 FROM sys.schemas WHERE name = '{schema}')\n"
-                        f"    EXEC('CREATE SCHEMA [{schema}]');\nGO\n\n"
-                    )
+            for schema in schemas:
+                f.write(
+                    f"IF NOT EXISTS (SELECT 1 FROM sys.schemas WHERE name = '{schema}')\n"
+                    f"    EXEC('CREATE SCHEMA [{schema}]');\nGO\n\n"
+                )
 
             return True
 
@@ -868,7 +987,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error("Error generando schemas: " + str(e))
             return False
 
-    def _generate_roles(self, conn, script_file: Path):
+    def _generate_roles(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -885,14 +1004,13 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not roles:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- ROLES\n\n")
+            f.write("\n-- ROLES\n\n")
 
-                for r in roles:
-                    f.write(
-                        f"IF NOT EXISTS(SELECT 1 FROM sys.database_principals WHERE name = '{r}')\n"
-                        f"    CREATE ROLE [{r}];\nGO\n\n"
-                    )
+            for r in roles:
+                f.write(
+                    f"IF NOT EXISTS(SELECT 1 FROM sys.database_principals WHERE name = '{r}')\n"
+                    f"    CREATE ROLE [{r}];\nGO\n\n"
+                )
 
             return True
 
@@ -900,7 +1018,7 @@ class SQLServerBackupStrategy(BackupStrategy):
             self.logger.error("Error generando roles: " + str(e))
             return False
 
-    def _generate_permissions(self, conn, script_file: Path):
+    def _generate_permissions(self, conn, f: TextIO):
         try:
             cursor = conn.cursor()
 
@@ -922,20 +1040,19 @@ class SQLServerBackupStrategy(BackupStrategy):
             if not rows:
                 return True
 
-            with open(script_file, "a", encoding="utf-8") as f:
-                f.write("\n-- PERMISSIONS\n\n")
+            f.write("\n-- PERMISSIONS\n\n")
 
-                for principal, perm, state, objtype, objname in rows:
-                    if objname:
-                        f.write(
-                            f"GRANT {perm} ON [{objname}] TO [{principal}];\n"
-                        )
-                    else:
-                        f.write(
-                            f"GRANT {perm} TO [{principal}];\n"
-                        )
+            for principal, perm, state, objtype, objname in rows:
+                if objname:
+                    f.write(
+                        f"GRANT {perm} ON [{objname}] TO [{principal}];\n"
+                    )
+                else:
+                    f.write(
+                        f"GRANT {perm} TO [{principal}];\n"
+                    )
 
-                f.write("GO\n\n")
+            f.write("GO\n\n")
 
             return True
 
@@ -1,28 +1,101 @@
 """
 Tests unitarios para el sistema de backup
 """
+import contextlib
+import datetime
+import decimal
+import gzip
+import io
+import os
+import time
 import unittest
 from pathlib import Path
 import tempfile
 import shutil
+import subprocess
 import sys
+import threading
+from unittest import mock
 
-# Agregar src al path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Agregar src al path (una sola vez aunque el módulo se importe de nuevo)
+_ROOT = str(Path(__file__).parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.config import Config
 from src.models import DatabaseConfig, BackupSettings, BackupResult
 from src.repositories.config_repository import ConfigRepository
 from src.factories.strategy_factory import BackupStrategyFactory
+from src.services import backup_service
+from src.services.backup_service import BackupService
+from src.services import cleanup_service
 from src.services.cleanup_service import CleanupService
+from src.strategies import base_strategy, sqlserver_strategy
+from src.strategies.mysql_strategy import MySQLBackupStrategy
+from src.strategies.sqlserver import data_generator, script_utils, sqlserver_backup_strategy
+from src.strategies.sqlserver.connection_pool import ConnectionPool
+from src.strategies.sqlserver.data_generator import DataGenerator, column_formatters
+from src.strategies.sqlserver.triggers_generator import _trigger_script
+from src.strategies.sqlserver_strategy import SQLServerBackupStrategy
+
+
+def _fast_tmp() -> str:
+    """Directorio en RAM (/dev/shm) si existe y es escribible; si no, el temporal del sistema"""
+    shm = Path('/dev/shm')
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return tempfile.gettempdir()
+
+
+def _touch(path: Path, data: bytes = b"test content"):
+    """Crea un archivo de prueba escribiendo bytes (sin capa de texto)"""
+    path.write_bytes(data)
+
+
+class _FakeCursor:
+    """Cursor pyodbc mínimo: devuelve filas fijas y registra las consultas"""
+
+    def __init__(self, columns, rows):
+        # columns: lista de (nombre, tipo Python) como en cursor.description
+        self.description = [(name, type_code, None, None, None, None, True)
+                            for name, type_code in columns]
+        self._rows = list(rows)
+        self.queries = []
+
+    def execute(self, sql, *params):
+        self.queries.append(sql)
+        return self
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+
+class _TempDirTestCase(unittest.TestCase):
+    """Base para tests que necesitan un directorio temporal propio"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Directorio raíz de la clase: cada test solo crea un subdirectorio"""
+        cls._root = Path(tempfile.mkdtemp(prefix='qdb_tests_', dir=_fast_tmp()))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Elimina el directorio raíz de la clase"""
+        shutil.rmtree(cls._root, ignore_errors=True)
+
+    def setUp(self):
+        """Subdirectorio del test; se borra con el directorio raíz de la clase"""
+        self.temp_dir = Path(tempfile.mkdtemp(dir=self._root))
 
 
 class TestModels(unittest.TestCase):
     """Tests para modelos de datos"""
-    
-    def test_database_config_creation(self):
-        """Test creación de DatabaseConfig"""
-        db = DatabaseConfig(
+
+    @classmethod
+    def setUpClass(cls):
+        """Datos de conexión válidos compartidos por los tests"""
+        cls._valid_db_kwargs = dict(
             name="test_db",
             type="mysql",
             host="localhost",
@@ -30,6 +103,10 @@ class TestModels(unittest.TestCase):
             user="root",
             password="password"
         )
+    
+    def test_database_config_creation(self):
+        """Test creación de DatabaseConfig"""
+        db = DatabaseConfig(**self._valid_db_kwargs)
         self.assertEqual(db.name, "test_db")
         self.assertEqual(db.type, "mysql")
         self.assertTrue(db.enabled)
@@ -37,14 +114,8 @@ class TestModels(unittest.TestCase):
     def test_database_config_validation(self):
         """Test validación de DatabaseConfig"""
         with self.assertRaises(ValueError):
-            DatabaseConfig(
-                name="",  # Nombre vacío debe fallar
-                type="mysql",
-                host="localhost",
-                port=3306,
-                user="root",
-                password="password"
-            )
+            # Nombre vacío debe fallar
+            DatabaseConfig(**{**self._valid_db_kwargs, "name": ""})
     
     def test_backup_settings_creation(self):
         """Test creación de BackupSettings"""
@@ -64,6 +135,16 @@ class TestModels(unittest.TestCase):
                 schedule="25:00"  # Hora inválida
             )
     
+    def test_backup_settings_schedule_formats(self):
+        """Test horarios HH:MM aceptados y rechazados"""
+        for valid in ("00:00", "09:30", "19:59", "23:59"):
+            with self.subTest(schedule=valid):
+                self.assertEqual(BackupSettings(schedule=valid).schedule, [valid])
+        for invalid in ("24:00", "12:60", "9:30", "09:30 ", "0930", "ab:cd", 930):
+            with self.subTest(schedule=invalid):
+                with self.assertRaises(ValueError):
+                    BackupSettings(schedule=[invalid])
+    
     def test_backup_result_creation(self):
         """Test creación de BackupResult"""
         result = BackupResult(
@@ -76,20 +157,15 @@ class TestModels(unittest.TestCase):
         self.assertIn("test_db", str(result))
 
 
-class TestConfigRepository(unittest.TestCase):
+class TestConfigRepository(_TempDirTestCase):
     """Tests para ConfigRepository"""
     
     def setUp(self):
         """Setup para tests"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.config_file = Path(self.temp_dir) / "test_config.json"
+        super().setUp()
+        self.config_file = self.temp_dir / "test_config.json"
         self.repo = ConfigRepository(self.config_file)
     
-    def tearDown(self):
-        """Cleanup después de tests"""
-        if Path(self.temp_dir).exists():
-            shutil.rmtree(self.temp_dir)
-    
     def test_load_nonexistent_config(self):
         """Test cargar configuración inexistente"""
         config = self.repo.load()
@@ -118,6 +194,14 @@ class TestConfigRepository(unittest.TestCase):
         loaded = self.repo.load()
         self.assertEqual(loaded['databases'][0]['name'], 'test_db')
     
+    def test_save_format(self):
+        """Test que save() escribe JSON con sangría de 4 y sin escapar acentos"""
+        self.assertTrue(self.repo.save({"databases": [], "backup_settings": {"nota": "año"}}))
+        self.assertEqual(
+            self.config_file.read_text(encoding='utf-8'),
+            '{\n    "databases": [],\n    "backup_settings": {\n        "nota": "año"\n    }\n}'
+        )
+    
     def test_get_databases(self):
         """Test obtener lista de bases de datos"""
         databases = self.repo.get_databases()
@@ -128,54 +212,107 @@ class TestConfigRepository(unittest.TestCase):
         settings = self.repo.get_backup_settings()
         self.assertIsInstance(settings, BackupSettings)
 
+    def test_get_backup_settings_reads_table_workers(self):
+        """Test que table_workers se lee del archivo (4 por defecto)"""
+        self.assertEqual(self.repo.get_backup_settings().table_workers, 4)
+        self.repo.save({"databases": [], "backup_settings": {"table_workers": 2}})
+        self.repo.load()
+        self.assertEqual(self.repo.get_backup_settings().table_workers, 2)
+
+    def test_get_backup_settings_reads_annual_flag(self):
+        """Test que annual_backup_enabled se lee del archivo"""
+        self.repo.save({
+            "databases": [],
+            "backup_settings": {"annual_backup_enabled": False}
+        })
+        self.repo.load()
+        settings = self.repo.get_backup_settings()
+        self.assertFalse(settings.annual_backup_enabled)
+
+    def test_get_databases_resolves_env_credentials(self):
+        """Test que solo un valor ${VAR} completo se resuelve desde el entorno"""
+        self.repo.save({"databases": [
+            {"name": "a", "user": "${QDB_TEST_USER}", "password": "${QDB_TEST_MISSING}"},
+            {"name": "b", "user": "x${QDB_TEST_USER}", "password": "${QDB_TEST_USER}x"},
+        ]})
+        self.repo.load()
+        with mock.patch.dict(os.environ, {"QDB_TEST_USER": "backup"}):
+            os.environ.pop("QDB_TEST_MISSING", None)
+            a, b = self.repo.get_databases()
+        self.assertEqual((a.user, a.password), ("backup", ""))
+        self.assertEqual((b.user, b.password), ("x${QDB_TEST_USER}", "${QDB_TEST_USER}x"))
+
+    def _write_config(self, retention_days: int, mtime_ns: int):
+        """Escribe la configuración sin pasar por save() y fija su mtime"""
+        self.config_file.write_text(
+            '{"databases": [], "backup_settings": {"retention_days": %d}}' % retention_days
+        )
+        os.utime(self.config_file, ns=(mtime_ns, mtime_ns))
+
+    def test_load_sees_rewrite_with_same_mtime(self):
+        """Test que una reescritura dentro del mismo tick de mtime se lee igualmente"""
+        self._write_config(1, 1_000_000_000_000_000_000)
+        self.assertEqual(self.repo.load()['backup_settings']['retention_days'], 1)
+        self._write_config(30, 1_000_000_000_000_000_000)
+        self.assertEqual(self.repo.load()['backup_settings']['retention_days'], 30)
+
+    def test_load_isolated_between_instances(self):
+        """Test que modificar la configuración cargada no afecta a otras instancias"""
+        self._write_config(2, 1_000_000_000_000_000_000)
+        loaded = ConfigRepository(self.config_file).load()
+        loaded['backup_settings']['retention_days'] = 99
+        loaded['databases'].append({"name": "x"})
+        other = ConfigRepository(self.config_file).load()
+        self.assertEqual(other['backup_settings']['retention_days'], 2)
+        self.assertEqual(other['databases'], [])
+
 
 class TestBackupStrategyFactory(unittest.TestCase):
     """Tests para BackupStrategyFactory"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Crea una sola vez las estrategias y los tipos soportados"""
+        cls._strategies = {
+            t: BackupStrategyFactory.create(t)
+            for t in ('mysql', 'postgresql', 'sqlserver', 'oracle')
+        }
+        cls._types = BackupStrategyFactory.get_supported_types()
     
-    def test_create_mysql_strategy(self):
-        """Test crear estrategia MySQL"""
-        strategy = BackupStrategyFactory.create('mysql')
-        self.assertIsNotNone(strategy)
-        self.assertEqual(strategy.__class__.__name__, 'MySQLBackupStrategy')
-    
-    def test_create_postgresql_strategy(self):
-        """Test crear estrategia PostgreSQL"""
-        strategy = BackupStrategyFactory.create('postgresql')
-        self.assertIsNotNone(strategy)
-        self.assertEqual(strategy.__class__.__name__, 'PostgreSQLBackupStrategy')
-    
-    def test_create_sqlserver_strategy(self):
-        """Test crear estrategia SQL Server"""
-        strategy = BackupStrategyFactory.create('sqlserver')
-        self.assertIsNotNone(strategy)
-        self.assertEqual(strategy.__class__.__name__, 'SQLServerBackupStrategy')
+    def test_create_strategy(self):
+        """Test crear estrategia para cada tipo soportado"""
+        expected = {
+            'mysql': 'MySQLBackupStrategy',
+            'postgresql': 'PostgreSQLBackupStrategy',
+            'sqlserver': 'SQLServerBackupStrategy',
+        }
+        for db_type, class_name in expected.items():
+            with self.subTest(db_type=db_type):
+                strategy = self._strategies[db_type]
+                self.assertIsNotNone(strategy)
+                self.assertEqual(strategy.__class__.__name__, class_name)
     
     def test_create_unsupported_strategy(self):
         """Test crear estrategia no soportada"""
-        strategy = BackupStrategyFactory.create('oracle')
+        strategy = self._strategies['oracle']
         self.assertIsNone(strategy)
     
     def test_get_supported_types(self):
         """Test obtener tipos soportados"""
-        types = BackupStrategyFactory.get_supported_types()
+        types = self._types
         self.assertIn('mysql', types)
         self.assertIn('postgresql', types)
         self.assertIn('sqlserver', types)
 
 
-class TestCleanupService(unittest.TestCase):
+class TestCleanupService(_TempDirTestCase):
     """Tests para CleanupService"""
     
     def setUp(self):
         """Setup para tests"""
-        self.temp_dir = Path(tempfile.mkdtemp())
+        super().setUp()
         self.service = CleanupService(retention_days=7)
     
-    def tearDown(self):
-        """Cleanup después de tests"""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
     def test_cleanup_nonexistent_directory(self):
         """Test limpieza de directorio inexistente"""
         fake_dir = self.temp_dir / "fake"
@@ -191,23 +328,588 @@ class TestCleanupService(unittest.TestCase):
     def test_get_backup_stats_with_files(self):
         """Test estadísticas con archivos"""
         # Crear archivo de prueba
-        test_file = self.temp_dir / "test_backup.sql"
-        test_file.write_text("test content")
+        _touch(self.temp_dir / "test_backup.sql")
         
         stats = self.service.get_backup_stats(self.temp_dir)
         self.assertEqual(stats['total_files'], 1)
         self.assertGreater(stats['total_size_mb'], 0)
 
+    def test_cleanup_and_stats(self):
+        """Test limpieza y estadísticas en un solo recorrido"""
+        old_time = time.time() - 30 * 86400
+        for name in ("old_backup.sql", "ANNUAL_2020_db.sql", "new_backup.sql"):
+            _touch(self.temp_dir / name)
+        for name in ("old_backup.sql", "ANNUAL_2020_db.sql"):
+            os.utime(self.temp_dir / name, (old_time, old_time))
+
+        deleted, stats = self.service.cleanup_and_stats(self.temp_dir)
+        self.assertEqual(deleted, 1)
+        self.assertFalse((self.temp_dir / "old_backup.sql").exists())
+        self.assertEqual(stats['total_files'], 2)
+        self.assertEqual(stats['annual_backups'], 1)
+
+    def test_cleanup_removes_stale_partial(self):
+        """Test limpieza de .partial/.tmp abandonados; los de un backup largo se conservan"""
+        stale_time = time.time() - cleanup_service.STALE_IN_PROGRESS_AGE - 3600
+        busy_time = time.time() - 6 * 3600
+        for name in ("db_20200101_020000.sql.partial", "tmpab12cd.tmp",
+                     "db_20200102_020000.sql.gz.partial", "tmpef34gh.tmp"):
+            _touch(self.temp_dir / name)
+        for name in ("db_20200101_020000.sql.partial", "tmpab12cd.tmp"):
+            os.utime(self.temp_dir / name, (stale_time, stale_time))
+        # Script SQL Server y tabla ya exportada esperando horas a que terminen otras
+        for name in ("db_20200102_020000.sql.gz.partial", "tmpef34gh.tmp"):
+            os.utime(self.temp_dir / name, (busy_time, busy_time))
+
+        deleted, stats = self.service.cleanup_and_stats(self.temp_dir)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)),
+                         ["db_20200102_020000.sql.gz.partial", "tmpef34gh.tmp"])
+        self.assertEqual(stats['total_files'], 0)
+
+    def test_cleanup_many_files_in_parallel(self):
+        """Test eliminación en paralelo de muchos vencidos (un error no corta el resto)"""
+        old_time = time.time() - 30 * 86400
+        count = cleanup_service._PARALLEL_UNLINK_THRESHOLD + 4
+        for i in range(count):
+            path = self.temp_dir / f"db{i}_20200101_020000.sql"
+            _touch(path)
+            os.utime(path, (old_time, old_time))
+        _touch(self.temp_dir / "new_backup.sql")
+
+        real_unlink = os.unlink
+
+        def unlink(path):
+            if os.path.basename(path).startswith("db0_"):
+                raise PermissionError("en uso")
+            real_unlink(path)
+
+        with mock.patch.object(cleanup_service, 'ThreadPoolExecutor',
+                               wraps=cleanup_service.ThreadPoolExecutor) as pool, \
+                mock.patch.object(cleanup_service.os, 'unlink', side_effect=unlink):
+            deleted, stats = self.service.cleanup_and_stats(self.temp_dir)
+        pool.assert_called_once()
+        self.assertEqual(deleted, count - 1)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)),
+                         ["db0_20200101_020000.sql", "new_backup.sql"])
+
+
+class _RecordingStrategy:
+    """Estrategia falsa: registra las rutas pedidas y el hilo que ejecuta cada backup"""
+
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.calls = []
+
+    def configure(self, settings):
+        pass
+
+    def execute_backup(self, db_config, output_file):
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.calls.append((db_config.name, output_file, threading.get_ident()))
+        return BackupResult(database_name=db_config.name, success=True)
+
+
+class TestBackupService(_TempDirTestCase):
+    """Tests para BackupService con una estrategia falsa"""
+
+    def setUp(self):
+        """Directorios de backup dentro del directorio temporal"""
+        super().setUp()
+        patcher = mock.patch.multiple(Config, BACKUP_DIR=self.temp_dir,
+                                      ANNUAL_BACKUP_DIR=self.temp_dir / "Annual",
+                                      _dirs_ready=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _service(self, strategy, names, **settings):
+        """BackupService con las bases dadas, todas servidas por strategy"""
+        repo = mock.Mock()
+        repo.get_databases.return_value = [
+            DatabaseConfig(name=name, type="mysql", host="localhost", port=3306,
+                           user="root", password="x")
+            for name in names
+        ]
+        repo.get_backup_settings.return_value = BackupSettings(**settings)
+        with mock.patch.object(backup_service.BackupStrategyFactory, 'create', return_value=strategy):
+            return BackupService(repo)
+
+    def test_backup_all_databases_parallel(self):
+        """Test que con parallel_workers > 1 los backups se ejecutan a la vez"""
+        # La barrera solo se abre si las tres bases están en curso al mismo tiempo
+        strategy = _RecordingStrategy(threading.Barrier(3, timeout=5))
+        service = self._service(strategy, ["a", "b", "c"], parallel_workers=3)
+        results = service.backup_all_databases()
+        self.assertEqual([r.database_name for r in results], ["a", "b", "c"])
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(len({thread for _, _, thread in strategy.calls}), 3)
+        # Un único timestamp para todo el lote
+        self.assertEqual(len({path.name.split("_", 1)[1] for _, path, _ in strategy.calls}), 1)
+
+    def test_backup_all_databases_sequential(self):
+        """Test que con parallel_workers = 1 los backups se ejecutan en orden en el hilo actual"""
+        strategy = _RecordingStrategy()
+        service = self._service(strategy, ["a", "b", "c"], parallel_workers=1)
+        service.backup_all_databases()
+        self.assertEqual([name for name, _, _ in strategy.calls], ["a", "b", "c"])
+        self.assertEqual({thread for _, _, thread in strategy.calls}, {threading.get_ident()})
+
+
+    def test_duplicate_database_names_rejected(self):
+        """Test que dos bases con el mismo nombre (mismo archivo de salida) se rechazan"""
+        with self.assertRaises(ValueError):
+            self._service(_RecordingStrategy(), ["a", "b", "a"])
+
+    def test_parallel_workers_default_is_sequential(self):
+        """Test que por defecto los backups se ejecutan de uno en uno"""
+        self.assertEqual(BackupSettings().parallel_workers, 1)
+        strategy = _RecordingStrategy()
+        self._service(strategy, ["a", "b"]).backup_all_databases()
+        self.assertEqual({thread for _, _, thread in strategy.calls}, {threading.get_ident()})
+
+    def test_backup_file_names(self):
+        """Test nombre y directorio del backup según compress y tipo (diario/anual)"""
+        for compress, is_annual, expected in ((True, False, "db_20240101_020000.sql.gz"),
+                                              (False, False, "db_20240101_020000.sql"),
+                                              (True, True, "Annual/ANNUAL_2024_db_20240101_020000.sql.gz")):
+            with self.subTest(compress=compress, is_annual=is_annual):
+                strategy = _RecordingStrategy()
+                service = self._service(strategy, ["db"], compress=compress)
+                service._backup_single_database(service.databases[0], is_annual, "20240101_020000")
+                _, path, _ = strategy.calls[0]
+                self.assertEqual(path, self.temp_dir / expected)
+
 
-def run_tests():
-    """Ejecuta todos los tests"""
-    loader = unittest.TestLoader()
-    suite = loader.loadTestsFromModule(sys.modules[__name__])
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    return result.wasSuccessful()
+class TestRunDump(_TempDirTestCase):
+    """Tests del volcado de una herramienta externa a archivo (con o sin gzip)"""
+
+    # Salida de la herramienta simulada: más de un bloque de copia
+    _DATA = b"INSERT INTO t VALUES (1);\n" * 50000
+
+    def setUp(self):
+        """Setup para tests"""
+        super().setUp()
+        self.strategy = MySQLBackupStrategy()
+        self.source = self.temp_dir / "source.sql"
+        _touch(self.source, self._DATA)
+
+    def _cmd(self, then: str = "sys.exit(0)") -> list:
+        """Comando que copia source.sql a stdout y después ejecuta then"""
+        return [sys.executable, "-c",
+                "import shutil, sys; "
+                "shutil.copyfileobj(open(sys.argv[1], 'rb'), sys.stdout.buffer); "
+                f"sys.stdout.flush(); {then}", str(self.source)]
+
+    def test_dump_plain(self):
+        """Test volcado sin comprimir a .sql"""
+        output = self.temp_dir / "db.sql"
+        self.assertEqual(self.strategy._run_dump(self._cmd(), output), (0, ""))
+        self.assertEqual(output.read_bytes(), self._DATA)
+
+    @unittest.skipUnless(shutil.which('pigz') or shutil.which('gzip'), "pigz/gzip no instalados")
+    def test_dump_compressed_with_external_tool(self):
+        """Test volcado a .sql.gz comprimido con pigz/gzip"""
+        output = self.temp_dir / "db.sql.gz"
+        self.assertEqual(self.strategy._run_dump(self._cmd(), output), (0, ""))
+        self.assertEqual(gzip.decompress(output.read_bytes()), self._DATA)
+
+    def test_dump_compressed_without_external_tool(self):
+        """Test volcado a .sql.gz con el módulo gzip cuando no hay pigz/gzip"""
+        output = self.temp_dir / "db.sql.gz"
+        with mock.patch.object(base_strategy.shutil, 'which', return_value=None):
+            self.assertEqual(self.strategy._run_dump(self._cmd(), output), (0, ""))
+        self.assertEqual(gzip.decompress(output.read_bytes()), self._DATA)
+
+    def test_dump_published_only_when_complete(self):
+        """Test que el volcado se escribe en .partial y se renombra al terminar"""
+        output = self.temp_dir / "db.sql.gz"
+        seen = []
+        real_replace = os.replace
+
+        def replace(src, dst):
+            seen.append((Path(src).name, Path(dst).name, Path(src).exists(), Path(dst).exists()))
+            real_replace(src, dst)
+
+        with mock.patch.object(base_strategy.os, 'replace', side_effect=replace):
+            self.strategy._run_dump(self._cmd(), output)
+        self.assertEqual(seen, [("db.sql.gz.partial", "db.sql.gz", True, False)])
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["db.sql.gz", "source.sql"])
+
+    def test_dump_failure_leaves_no_file(self):
+        """Test que un volcado fallido no publica nada ni deja el .partial"""
+        for name in ("db.sql", "db.sql.gz"):
+            with self.subTest(output=name):
+                returncode, stderr = self.strategy._run_dump(
+                    self._cmd("sys.stderr.write('access denied'); sys.exit(2)"), self.temp_dir / name)
+                self.assertEqual((returncode, stderr), (2, "access denied"))
+                self.assertEqual(os.listdir(self.temp_dir), ["source.sql"])
+
+    def test_dump_timeout_leaves_no_file(self):
+        """Test que un volcado que supera el timeout no deja el .partial"""
+        for name in ("db.sql", "db.sql.gz"):
+            with self.subTest(output=name):
+                with self.assertRaises(subprocess.TimeoutExpired):
+                    self.strategy._run_dump(self._cmd("import time; time.sleep(30)"),
+                                            self.temp_dir / name, timeout=0.5)
+                self.assertEqual(os.listdir(self.temp_dir), ["source.sql"])
+
+    def test_dump_compression_error_reaps_dump_process(self):
+        """Test que si la compresión falla el proceso de volcado se termina y se recoge"""
+        real_popen = subprocess.Popen
+        for case in ("compressor", "gzip_module"):
+            with self.subTest(case=case):
+                procs = []
+
+                def popen(cmd, *args, **kwargs):
+                    if procs:
+                        raise OSError(2, "No such file or directory", cmd[0])
+                    procs.append(real_popen(cmd, *args, **kwargs))
+                    return procs[0]
+
+                if case == "compressor":
+                    patches = (mock.patch.object(base_strategy.shutil, 'which', return_value="pigz"),
+                               mock.patch.object(base_strategy.subprocess, 'Popen', side_effect=popen))
+                else:
+                    patches = (mock.patch.object(base_strategy.shutil, 'which', return_value=None),
+                               mock.patch.object(base_strategy.subprocess, 'Popen', side_effect=popen),
+                               mock.patch.object(base_strategy.shutil, 'copyfileobj',
+                                                 side_effect=OSError(28, "No space left on device")))
+                with contextlib.ExitStack() as stack:
+                    for patch in patches:
+                        stack.enter_context(patch)
+                    with self.assertRaises(OSError):
+                        self.strategy._run_dump(self._cmd(), self.temp_dir / "db.sql.gz")
+                self.assertIsNotNone(procs[0].returncode)
+                self.assertTrue(procs[0].stdout.closed)
+                self.assertEqual(os.listdir(self.temp_dir), ["source.sql"])
+
+
+class TestSqlServerStrategy(_TempDirTestCase):
+    """Tests del script generado por SQLServerBackupStrategy (sin servidor)"""
+
+    def setUp(self):
+        """Setup para tests"""
+        super().setUp()
+        self.strategy = SQLServerBackupStrategy()
+
+    def _export(self, cursor, schema, table, has_identity=False, row_count=0) -> str:
+        """Exporta una tabla con el cursor dado y devuelve el texto escrito"""
+        out = io.StringIO()
+        self.strategy._export_table_data(cursor, schema, table, has_identity, row_count, 1, 1, out)
+        return out.getvalue()
+
+    def test_export_quotes_identifiers(self):
+        """Test que esquema, tabla y columnas con ']' se escapan en todo el script"""
+        cursor = _FakeCursor([("col]x", int)], [(1,)])
+        script = self._export(cursor, "s]1", "t]1", has_identity=True, row_count=1)
+        self.assertEqual(cursor.queries, ["SELECT * FROM [s]]1].[t]]1]"])
+        self.assertIn("INSERT INTO [s]]1].[t]]1] ([col]]x]) VALUES\n(1);", script)
+        self.assertIn("SET IDENTITY_INSERT [s]]1].[t]]1] ON;", script)
+        self.assertIn("SET IDENTITY_INSERT [s]]1].[t]]1] OFF;", script)
+        self.assertIn("-- Datos de [s]]1].[t]]1] (1 registros)", script)
+        self.assertNotIn("[s]1]", script)
+
+    def test_export_formats_each_column_type(self):
+        """Test que cada columna se formatea según su tipo (NULL incluido)"""
+        cursor = _FakeCursor([("s", str), ("n", decimal.Decimal), ("t", datetime.date),
+                              ("b", bytes), ("f", bool)],
+                             [("it's", decimal.Decimal("2.50"), datetime.date(2024, 1, 2), b"\xab", False),
+                              (None, None, None, None, None)])
+        script = self._export(cursor, "dbo", "t", row_count=2)
+        self.assertIn("VALUES\n('it''s', 2.50, '2024-01-02', 0xab, 0),\n"
+                      "(NULL, NULL, NULL, NULL, NULL);\n", script)
+
+    def test_export_multi_row_inserts_and_go_batches(self):
+        """Test un INSERT por lote de ROWS_PER_INSERT filas y un GO cada INSERTS_PER_GO"""
+        cursor = _FakeCursor([("id", int)], [(n,) for n in range(1, 6)])
+        with mock.patch.multiple(sqlserver_strategy, ROWS_PER_INSERT=2, INSERTS_PER_GO=2):
+            script = self._export(cursor, "dbo", "t", row_count=5)
+        insert = "INSERT INTO [dbo].[t] ([id]) VALUES\n"
+        self.assertEqual(script, (
+            "\n-- Datos de [dbo].[t] (5 registros)\n"
+            f"{insert}(1),\n(2);\n{insert}(3),\n(4);\nGO\n"
+            f"{insert}(5);\nGO\n\n"
+        ))
+
+    def test_configure_table_workers(self):
+        """Test que table_workers de la configuración llega a la estrategia"""
+        self.strategy.configure(BackupSettings(table_workers=2))
+        self.assertEqual(self.strategy.table_workers, 2)
+
+    def test_parallel_export_failed_connect_releases_temp_files(self):
+        """Test que una conexión fallida no deja temporales ni descriptores abiertos"""
+        def connect():
+            raise ConnectionError("sin servidor")
+
+        tables = [(1, "dbo", "a", 0, 1), (2, "dbo", "b", 0, 1)]
+        self.strategy.table_workers = 2
+        fd_dir = Path("/proc/self/fd")
+        with open(self.temp_dir / "db.sql.partial", "w", encoding="utf-8") as f:
+            open_fds = len(os.listdir(fd_dir)) if fd_dir.is_dir() else None
+            with self.assertRaises(ConnectionError):
+                self.strategy._export_data_parallel(tables, connect, f)
+            if open_fds is not None:
+                self.assertEqual(len(os.listdir(fd_dir)), open_fds)
+        self.assertEqual(os.listdir(self.temp_dir), ["db.sql.partial"])
+
+
+    def test_failed_module_fetch_fails_backup(self):
+        """Test que un error leyendo módulos falla el backup y no publica el script"""
+        conn = mock.MagicMock()
+        conn.cursor.side_effect = RuntimeError("sys.sql_modules no disponible")
+        db_config = DatabaseConfig(name="db", type="sqlserver", host="localhost",
+                                   port=1433, user="sa", password="x")
+        with mock.patch.multiple(self.strategy, _connect=mock.Mock(return_value=conn),
+                                 _list_tables=mock.Mock(return_value=[]),
+                                 _generate_schema=mock.Mock(return_value=True),
+                                 _generate_data=mock.Mock(return_value=True),
+                                 _generate_defaults=mock.Mock(return_value=True),
+                                 _generate_indexes=mock.Mock(return_value=True)):
+            result = self.strategy.backup(db_config, self.temp_dir / "db.sql")
+        self.assertFalse(result.success)
+        self.assertEqual(result.error, "Error leyendo módulos")
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+class TestSqlServerDataGenerator(unittest.TestCase):
+    """Tests de los INSERT generados por DataGenerator"""
+
+    def test_column_formatters(self):
+        """Test un formateador por tipo de columna, con NULL en todos"""
+        description = _FakeCursor([("s", str), ("i", int), ("d", decimal.Decimal), ("b", bool),
+                                   ("t", datetime.datetime), ("x", bytes), ("o", object)], []).description
+        formatters = column_formatters(description)
+        row = ("O'Brien", 5, decimal.Decimal("1.50"), True,
+               datetime.datetime(2024, 1, 2, 3, 4, 5), b"\x01\xff", "x'y")
+        self.assertEqual([fmt(v) for fmt, v in zip(formatters, row)],
+                         ["'O''Brien'", "5", "1.50", "1", "'2024-01-02 03:04:05'", "0x01ff", "'x''y'"])
+        self.assertEqual([fmt(None) for fmt in formatters], ["NULL"] * len(formatters))
+
+    def test_export_table_multi_row_inserts(self):
+        """Test que cada lote de ROWS_PER_INSERT filas es un único INSERT ... VALUES"""
+        cursor = _FakeCursor([("id", int), ("name", str)], [(1, "a"), (2, "b"), (3, None)])
+        out = io.BytesIO()
+        with mock.patch.object(data_generator, 'ROWS_PER_INSERT', 2):
+            DataGenerator(mock.Mock())._export_table(cursor, "dbo", "t", True, 1, 1, out)
+        script = out.getvalue().decode('utf-8')
+        self.assertEqual(script.count("INSERT INTO"), 2)
+        self.assertIn(" VALUES\n(1, 'a'),\n(2, 'b');\nGO\n", script)
+        self.assertIn(" VALUES\n(3, NULL);\nGO\n", script)
+        self.assertEqual(script.count("SET IDENTITY_INSERT"), 2)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests para ConnectionPool"""
+
+    def test_acquire_reuses_idle_connection(self):
+        """Test que una conexión devuelta se reutiliza sin abrir otra"""
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pool = ConnectionPool(connect, size=2)
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_acquire_never_exceeds_size(self):
+        """Test que con el pool lleno los hilos esperan una conexión libre"""
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pool = ConnectionPool(connect, size=2)
+        in_use = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with pool.acquire() as conn:
+                with lock:
+                    in_use.append(conn)
+                    peak.append(len(in_use))
+                time.sleep(0.01)
+                with lock:
+                    in_use.remove(conn)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(peak), 6)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(connect.call_count, 2)
+
+    def test_failed_connect_releases_slot(self):
+        """Test que un error al conectar no ocupa un hueco del pool"""
+        conn = mock.Mock()
+        pool = ConnectionPool(mock.Mock(side_effect=[ConnectionError("sin servidor"), conn]), size=1)
+        with self.assertRaises(ConnectionError):
+            with pool.acquire():
+                pass
+        with pool.acquire() as acquired:
+            self.assertIs(acquired, conn)
+
+    def test_close_closes_every_connection(self):
+        """Test que close() cierra las conexiones abiertas y añadidas (aunque alguna falle)"""
+        opened, added = mock.Mock(), mock.Mock()
+        added.close.side_effect = RuntimeError("ya cerrada")
+        pool = ConnectionPool(mock.Mock(return_value=opened), size=2)
+        pool.add(added)
+        with pool.acquire(), pool.acquire():
+            pass
+        pool.close()
+        opened.close.assert_called_once_with()
+        added.close.assert_called_once_with()
+
+
+class TestScriptUtils(_TempDirTestCase):
+    """Tests de las utilidades de escritura de scripts SQL Server"""
+
+    def test_write_batches(self):
+        """Test que las sentencias se agrupan en lotes separados por GO"""
+        out = io.StringIO()
+        script_utils.write_batches(out, ["A", "B", "C", "D", "E"], batch_size=2)
+        self.assertEqual(out.getvalue(), "A;\nB;\nGO\nC;\nD;\nGO\nE;\nGO\n")
+        out = io.StringIO()
+        script_utils.write_batches(out, [])
+        self.assertEqual(out.getvalue(), "")
+
+    def _source(self) -> Path:
+        """Archivo temporal de una tabla, como los que se añaden al script"""
+        source = self.temp_dir / "table.tmp"
+        _touch(source, b"INSERT INTO t VALUES (1);\n" * 1000)
+        return source
+
+    @unittest.skipUnless(hasattr(os, 'copy_file_range'), "copy_file_range no disponible")
+    def test_append_file_copies_in_kernel(self):
+        """Test que append_file copia con copy_file_range tras lo ya escrito en el buffer"""
+        source = self._source()
+        target = self.temp_dir / "script.sql"
+        with mock.patch.object(script_utils, '_copy_file_range', wraps=os.copy_file_range) as copy:
+            with open(target, "wb") as out:
+                out.write(b"-- head\n")
+                script_utils.append_file(out, source)
+                out.write(b"-- tail\n")
+        copy.assert_called()
+        self.assertEqual(target.read_bytes(), b"-- head\n" + source.read_bytes() + b"-- tail\n")
+
+    def test_append_file_falls_back_to_copy(self):
+        """Test que sin soporte de copy_file_range se usa la copia normal"""
+        source = self._source()
+        target = self.temp_dir / "script.sql"
+        unsupported = mock.Mock(side_effect=OSError(18, "Invalid cross-device link"))
+        with mock.patch.object(script_utils, '_copy_file_range', unsupported):
+            with open(target, "wb") as out:
+                out.write(b"-- head\n")
+                script_utils.append_file(out, source)
+        self.assertEqual(target.read_bytes(), b"-- head\n" + source.read_bytes())
+
+    def test_append_files_skips_missing(self):
+        """Test que append_files añade al final solo las secciones que existen"""
+        source = self._source()
+        target = self.temp_dir / "script.sql"
+        _touch(target, b"-- head\n")
+        script_utils.append_files(target, [source, self.temp_dir / "missing.sql"])
+        self.assertEqual(target.read_bytes(), b"-- head\n" + source.read_bytes())
+
+    def test_append_file_into_gzip_script(self):
+        """Test que en un script .gz lo añadido pasa por el compresor"""
+        source = self._source()
+        target = self.temp_dir / "script.sql.gz"
+        with mock.patch.object(script_utils, '_copy_file_range') as copy:
+            with SQLServerBackupStrategy._open_script(target, True) as f:
+                f.write("-- head\n")
+                f.flush()
+                script_utils.append_file(f.buffer, source)
+                f.write("-- tail\n")
+        copy.assert_not_called()
+        self.assertEqual(gzip.decompress(target.read_bytes()),
+                         b"-- head\n" + source.read_bytes() + b"-- tail\n")
+
+
+class TestSqlServerTriggers(unittest.TestCase):
+    """Tests del script de triggers (CREATE OR ALTER o DROP + CREATE)"""
+
+    def test_create_or_alter(self):
+        """Test que CREATE TRIGGER se convierte en CREATE OR ALTER"""
+        script = _trigger_script("dbo", "tr1", "create  Trigger dbo.tr1 ON t AFTER INSERT AS SELECT 1", True)
+        self.assertEqual(script, "CREATE OR ALTER TRIGGER dbo.tr1 ON t AFTER INSERT AS SELECT 1\nGO\n\n")
+
+    def test_create_or_alter_skips_leading_comments(self):
+        """Test que los comentarios iniciales no se reescriben"""
+        definition = (
+            "-- create trigger for audit\n"
+            "/* CREATE TRIGGER histórico */\n"
+            "CREATE TRIGGER dbo.tr1 ON t AFTER INSERT AS SELECT 1"
+        )
+        script = _trigger_script("dbo", "tr1", definition, True)
+        self.assertEqual(script, (
+            "-- create trigger for audit\n"
+            "/* CREATE TRIGGER histórico */\n"
+            "CREATE OR ALTER TRIGGER dbo.tr1 ON t AFTER INSERT AS SELECT 1\nGO\n\n"
+        ))
+
+    def test_unrecognized_definition_falls_back_to_drop(self):
+        """Test que si CREATE TRIGGER no es la primera sentencia se usa DROP + CREATE"""
+        definition = "/* a /* anidado */ */\nCREATE TRIGGER dbo.tr1 ON t AFTER INSERT AS SELECT 1"
+        for create_or_alter in (True, False):
+            with self.subTest(create_or_alter=create_or_alter):
+                script = _trigger_script("dbo", "tr1", definition, create_or_alter)
+                self.assertTrue(script.startswith(
+                    "IF OBJECT_ID('[dbo].[tr1]', 'TR') IS NOT NULL DROP TRIGGER [dbo].[tr1];\nGO\n"
+                ))
+                self.assertIn(definition + "\nGO\n\n", script)
+
+
+class _FakeGenerator:
+    """Generador de sección que escribe un texto fijo o falla"""
+
+    def __init__(self, name: str, fails: bool):
+        self.name = name
+        self.fails = fails
+
+    def generate(self, conn, section_file: Path) -> bool:
+        if self.fails:
+            return False
+        section_file.write_text(f"-- {self.name}\n", encoding="utf-8")
+        return True
+
+
+class TestSqlServerSections(_TempDirTestCase):
+    """Tests de la unión de secciones de la estrategia modular de SQL Server"""
+
+    _GENERATORS = ("SchemaGenerator", "DataGenerator", "DefaultConstraintGenerator",
+                   "IndexGenerator", "StoredProcedureGenerator", "TriggerGenerator",
+                   "ViewGenerator", "ForeignKeyGenerator")
+
+    def _backup(self, failing=()):
+        """Ejecuta el backup con generadores simulados y sin servidor"""
+        generators = {
+            name: (lambda logger, pool=None, _n=name: _FakeGenerator(_n, _n in failing))
+            for name in self._GENERATORS
+        }
+        strategy = sqlserver_backup_strategy.SQLServerBackupStrategy()
+        db = DatabaseConfig(name="db", type="sqlserver", host="localhost", port=1433,
+                            user="sa", password="x")
+        with mock.patch.multiple(sqlserver_backup_strategy, **generators), \
+                mock.patch.object(strategy, "_connect", return_value=mock.Mock()):
+            return strategy.backup(db, self.temp_dir / "db.sql")
+
+    def test_all_sections_joined_in_order(self):
+        """Test que las secciones se unen en el orden del plan"""
+        result = self._backup()
+        self.assertTrue(result.success)
+        script = Path(result.output_file).read_text(encoding="utf-8")
+        positions = [script.index(f"-- {name}\n") for name in self._GENERATORS]
+        self.assertEqual(positions, sorted(positions))
 
+    def test_failed_section_fails_backup(self):
+        """Test que una sección fallida marca el backup como fallido"""
+        result = self._backup(failing=("DataGenerator", "ViewGenerator"))
+        self.assertFalse(result.success)
+        self.assertIn("data", result.error)
+        self.assertIn("views", result.error)
+        self.assertEqual(os.listdir(self.temp_dir), [])
 
 if __name__ == '__main__':
-    success = run_tests()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    unittest.main(verbosity=2)
\ No newline at end of file